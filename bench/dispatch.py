@@ -0,0 +1,60 @@
+''' Action dispatch overhead
+
+    $ python bench/dispatch.py [actions] [depth] [context size]
+'''
+from contextlib import ExitStack
+from sys import argv
+from time import perf_counter
+
+from setux.core.action import Action
+
+
+class Target:
+    journal = None
+    profiler = None
+
+    def __init__(self, size):
+        self.context = {f'key{i}': i for i in range(size)}
+
+
+class Scope(Action):
+    label = 'scope'
+
+
+class Check(Action):
+    label = 'check'
+
+    def check(self):
+        for _ in range(10):
+            ok = (
+                self.value
+                and self.level0 is not None
+                and self.key0 is not None
+                and self.missing is None
+            )
+        return ok
+
+    def deploy(self):
+        return True
+
+
+def bench(actions=1000, depth=5, size=50, rounds=20):
+    target = Target(size)
+    best = None
+    for _ in range(rounds):
+        with ExitStack() as scopes:
+            for level in range(depth):
+                scopes.enter_context(Scope(target, **{f'level{level}': level}))
+            start = perf_counter()
+            for _ in range(actions):
+                Check(target, value=1)(verbose=False)
+            elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{actions} actions, depth {depth}, context {size} : {best*1e6/actions:.1f} us / action')
+
+
+if __name__=='__main__':
+    actions = int(argv[1]) if len(argv)>1 else 1000
+    depth = int(argv[2]) if len(argv)>2 else 5
+    size = int(argv[3]) if len(argv)>3 else 50
+    bench(actions, depth, size)
@@ -8,8 +8,15 @@ class Installer(Action):
     def label(self):
         return f'install {self.name}'
 
+    @property
+    def touches(self):
+        return [('installed', self.packager.manager)]
+
     def check(self):
-        return self.name in [n.lower() for n,v in self.packager.installed(self.name)]
+        return self.fact(
+            ('installed', self.packager.manager, self.name),
+            lambda: self.name in [n.lower() for n,v in self.packager.installed(self.name)],
+        )
 
     def deploy(self):
         return self.packager.install_pkg(self.name, self.ver)
@@ -22,8 +29,15 @@ class Remover(Action):
     def label(self):
         return f'remove {self.name}'
 
+    @property
+    def touches(self):
+        return [('installed', self.packager.manager)]
+
     def check(self):
-        return self.name not in [n.lower() for n,v in self.packager.installed(self.name)]
+        return not self.fact(
+            ('installed', self.packager.manager, self.name),
+            lambda: self.name in [n.lower() for n,v in self.packager.installed(self.name)],
+        )
 
     def deploy(self):
         return self.packager.remove_pkg(self.name)
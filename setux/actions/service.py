@@ -8,11 +8,17 @@ class Enabler(Action):
     def label(self):
         return f'enable {self.name}'
 
+    @property
+    def touches(self):
+        return [('enabled', self.name)]
+
     def check(self):
-        return self.servicer.do_enabled(self.name)
+        return self.fact(('enabled', self.name), self.servicer.enabled, self.name)
 
     def deploy(self):
-        return self.servicer.do_enable(self.name)
+        ok = self.servicer.do_enable(self.name)
+        self.servicer.invalidate(self.name)
+        return ok
 
 
 class Disabler(Action):
@@ -22,11 +28,17 @@ class Disabler(Action):
     def label(self):
         return f'disable {self.name}'
 
+    @property
+    def touches(self):
+        return [('enabled', self.name)]
+
     def check(self):
-        return not self.servicer.do_enabled(self.name)
+        return not self.fact(('enabled', self.name), self.servicer.enabled, self.name)
 
     def deploy(self):
-        return self.servicer.do_disable(self.name)
+        ok = self.servicer.do_disable(self.name)
+        self.servicer.invalidate(self.name)
+        return ok
 
 
 class Starter(Action):
@@ -36,11 +48,16 @@ class Starter(Action):
     def label(self):
         return f'start {self.name}'
 
+    @property
+    def touches(self):
+        return [('active', self.name)]
+
     def check(self):
-        return self.servicer.status(self.name)
+        return self.fact(('active', self.name), self.servicer.status, self.name)
 
     def deploy(self):
         ok = self.servicer.do_start(self.name)
+        self.servicer.invalidate(self.name)
         if ok: self.servicer.wait(self.name)
         return ok
 
@@ -52,11 +69,16 @@ class Stoper(Action):
     def label(self):
         return f'stop {self.name}'
 
+    @property
+    def touches(self):
+        return [('active', self.name)]
+
     def check(self):
-        return not self.servicer.status(self.name)
+        return not self.fact(('active', self.name), self.servicer.status, self.name)
 
     def deploy(self):
         ok = self.servicer.do_stop(self.name)
+        self.servicer.invalidate(self.name)
         if ok: self.servicer.wait(self.name, up=False)
         return ok
 
@@ -68,13 +90,19 @@ class Restarter(Runner):
     def label(self):
         return f'restart {self.name}'
 
+    @property
+    def touches(self):
+        return [('active', self.name)]
+
     def deploy(self):
         ok = True
         if self.servicer.status(self.name):
             ok = self.servicer.do_stop(self.name)
+            self.servicer.invalidate(self.name)
             if ok: self.servicer.wait(self.name, up=False)
         if ok:
             ok = self.servicer.do_start(self.name)
+            self.servicer.invalidate(self.name)
             if ok: self.servicer.wait(self.name)
         return ok
 
@@ -1,27 +1,81 @@
+from collections import ChainMap
 from inspect import cleandoc
 
 from pybrary.func import todo
 
 from setux.logger import logger, error, green, yellow, red
+from .logger import captured, replay
+from .parallel import levels, pmap
+from .cache import FactCache
+from .journal import fingerprint
+from .profile import profiled
+from .errors import DeadlineError
+from . import deadline
 
 # pylint: disable=no-member,not-an-iterable
 
 
+missing = object()
+
+
+class Context(ChainMap):
+    ''' Stacked actions contexts, copy free
+        lookups are resolved once per scope
+    '''
+    def __init__(self, *maps):
+        super().__init__(*maps)
+        self.resolved = dict()
+
+    def get(self, key, default=None):
+        resolved = self.resolved
+        if key in resolved:
+            value = resolved[key]
+        else:
+            for mapping in self.maps:
+                if key in mapping:
+                    value = mapping[key]
+                    break
+            else:
+                value = missing
+            resolved[key] = value
+        return default if value is missing else value
+
+    def __getitem__(self, key):
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.resolved.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.resolved.pop(key, None)
+        super().__delitem__(key)
+
+
 class Action:
+    after = ()
+    touches = None
+    journaled = True
+
     def __init__(self, target, **context):
         self.target = target
         self.context = context
 
     def __getattr__(self, attr):
-        try:
-            return self.context[attr]
-        except KeyError:
-            try:
-                return self.target.context[attr]
-            except KeyError:
-                # debug(f'{attr} not in context ({self.label})')
-                if attr=='local': return self.target.set_local()
-                # raise AttributeError
+        context = self.context
+        if attr in context:
+            # own context : resolved once per instance
+            value = self.__dict__[attr] = context[attr]
+            return value
+        value = self.target.context.get(attr, missing)
+        if value is not missing:
+            return value
+        # debug(f'{attr} not in context ({self.label})')
+        if attr=='local': return self.target.set_local()
+        # raise AttributeError
 
     @property
     def labeler(self):
@@ -32,13 +86,40 @@ class Action:
         todo(self)
 
     def __enter__(self):
-        self.backup = dict(self.target.context)
-        self.target.context.update(self.context)
+        self.backup = self.target.context
+        maps = self.backup.maps if isinstance(self.backup, Context) else [self.backup]
+        if self.context and self.context is not maps[0]:
+            maps = [self.context] + maps
+        if not any('facts' in mapping for mapping in maps):
+            maps = [dict(facts=FactCache())] + maps
+        self.target.context = Context(*maps)
+
+    def fact(self, key, func, *a, **k):
+        ''' func(*a, **k) memoized in the run facts
+        '''
+        facts = self.facts
+        if facts is None:
+            return func(*a, **k)
+        return facts.get(key, func, *a, **k)
+
+    def forget(self):
+        ''' forget the facts touched by deploy (all if None)
+        '''
+        facts = self.facts
+        if facts is not None:
+            facts.forget(self.touches)
+
+    def checked(self):
+        ok = self.check()
+        events = getattr(self.target, 'events', None)
+        if events is not None:
+            events.emit('check', label=self.label, ok=ok)
+        return ok
 
     def _call_(self, verbose):
         with logger.quiet():
             try:
-                ok = self.check()
+                ok = self.checked()
             except Exception as x:
                 error(x)
                 red(f'!! {self.label}')
@@ -54,10 +135,12 @@ class Action:
                     error(x)
                     red(f'!! {self.label}')
                     return False
+                finally:
+                    self.forget()
 
             if ok:
                 try:
-                    ok = self.check()
+                    ok = self.checked()
                 except Exception as x:
                     error(x)
                     red(f'!! {self.label}')
@@ -69,13 +152,87 @@ class Action:
             red(f'XX {self.label}')
             return False
 
-    def __call__(self, verbose=True):
+    def depends(self):
+        ''' facts the outcome depends on, besides label and context
+        '''
+        return ()
+
+    def fingerprint(self):
+        return fingerprint(self.label, self.context, self.depends())
+
+    def __call__(self, verbose=True, force=False):
+        deadline.check(self.label)
+        outermost = not isinstance(self.target.context, Context)
+        try:
+            return self.traced(verbose, force)
+        finally:
+            # the journal is saved once, by the outermost action
+            journal = getattr(self.target, 'journal', None)
+            if outermost and journal is not None:
+                journal.save()
+
+    def traced(self, verbose, force):
+        events = getattr(self.target, 'events', None)
+        with profiled(self.target, lambda: f'action {self.label}'):
+            if events is None:
+                return self.call(verbose, force)
+            with events.span('action', label=self.label) as result:
+                ok = result['ok'] = self.call(verbose, force)
+            return ok
+
+    def call(self, verbose, force):
+        journal = getattr(self.target, 'journal', None) if self.journaled else None
+        if journal is None:
+            with self:
+                return self._call_(verbose)
+
+        key = f'{type(self).__module__}.{type(self).__qualname__} {self.label}'
+        digest = self.fingerprint()
+        if not force and journal.converged(key, digest):
+            if verbose: green(f'== {self.label}')
+            return True
         with self:
-            return self._call_(verbose)
+            ok = self._call_(verbose)
+        journal.record(key, digest, ok)
+        return ok
 
     def __exit__(self, typ, val, tb):
         self.target.context = self.backup
 
+    def leaves(self):
+        yield self
+
+    def scan(self, workers=None):
+        ''' drift report of the action tree, without deploying
+        '''
+        from .drift import scan
+        return scan(self, workers)
+
+    def converge(self):
+        ''' check, deploy, check without logging
+            return the label mark, to be reported
+        '''
+        try:
+            if self.checked(): return '=='
+            try:
+                if not self.deploy(): return 'XX'
+            finally:
+                self.forget()
+            return '>>' if self.checked() else 'XX'
+        except Exception as x:
+            error(x)
+            return '!!'
+
+    def report(self, mark, verbose=True):
+        if mark in ('>>', 'XX'):
+            with self.labeler(f'<> {self.label}'): pass
+        ok = mark in ('==', '>>', '..')
+        if ok:
+            if verbose or mark=='>>': green(f'{mark} {self.label}')
+        else:
+            red(f'{mark} {self.label}')
+        return ok
+
     @classmethod
     def help(cls):
         try:
@@ -85,6 +242,8 @@ class Action:
 
 
 class Runner(Action):
+    journaled = False   # always run
+
     def _call_(self, verbose):
         with logger.quiet():
             with self.labeler(f'<> {self.label}'):
@@ -93,6 +252,8 @@ class Runner(Action):
                 except Exception as x:
                     error(x)
                     ok = False
+                finally:
+                    self.forget()
             if ok:
                 if verbose: green(f'.. {self.label}')
                 return True
@@ -100,8 +261,21 @@ class Runner(Action):
                 if verbose: red(f'!! {self.label}')
                 return False
 
+    def converge(self):
+        try:
+            ok = self.deploy()
+        except Exception as x:
+            error(x)
+            ok = False
+        finally:
+            self.forget()
+        return '..' if ok else '!!'
+
 
 class Actions(Action):
+    parallel = False
+    workers = None
+
     @property
     def ignore(self):
         return getattr(self, '_continue_', False)
@@ -121,10 +295,20 @@ class Actions(Action):
             action = act(self.target, **self.context)
         return action
 
+    def leaves(self):
+        for dpl in self.actions:
+            yield from self.get_action(dpl).leaves()
+
+    def depends(self):
+        return [
+            (f'{type(action).__module__}.{type(action).__qualname__}', action.fingerprint())
+            for action in map(self.get_action, self.actions)
+        ]
+
     def check_action(self, action):
         if hasattr(action, 'check'):
             try:
-                ok = action.check()
+                ok = action.checked()
             except Exception as x:
                 error(x)
                 ok =  False
@@ -145,15 +329,62 @@ class Actions(Action):
                 err = str(x)
                 error(err)
                 ok =  False
+            finally:
+                action.forget()
         if err:
             red(f'!! {action.label}')
         return ok
 
+    def graph(self, actions):
+        ''' {action : actions it must follow}
+            from each action's "after" (Action classes or labels)
+        '''
+        return {
+            action : [
+                dep
+                for dep in actions
+                if type(dep) in action.after or dep.label in action.after
+            ]
+            for action in actions
+            if action.after
+        }
+
+    def schedule(self, func):
+        ''' yield action, func(action)
+            if parallel, independent actions are run concurrently
+            and their output is grouped per action
+        '''
+        def timed(action):
+            deadline.check(action.label)
+            with profiled(self.target, lambda: action.label):
+                return func(action)
+
+        if not self.parallel:
+            for dpl in self.actions:
+                action = self.get_action(dpl)
+                yield action, timed(action)
+            return
+
+        def call(action):
+            # errors are kept, to replay every branch before raising
+            with captured() as records:
+                try:
+                    return records, timed(action), None
+                except Exception as x:
+                    return records, False, x
+
+        actions = [self.get_action(dpl) for dpl in self.actions]
+        for step in levels(actions, self.graph(actions)):
+            results = pmap(call, step, self.workers)
+            for records, ok, err in results:
+                replay(records)
+            for action, (records, ok, err) in zip(step, results):
+                if err: raise err
+                yield action, ok
+
     def check(self):
         all_ok = True
-        for dpl in self.actions:
-            checker = self.get_action(dpl)
-            ok = self.check_action(checker)
+        for checker, ok in self.schedule(self.check_action):
             if not ok:
                 if self.ignore:
                     all_ok = False
@@ -163,9 +394,7 @@ class Actions(Action):
 
     def deploy(self):
         all_ok = True
-        for dpl in self.actions:
-            action = self.get_action(dpl)
-            ok = self.deploy_action(action)
+        for action, ok in self.schedule(self.deploy_action):
             if not ok:
                 if self.ignore:
                     all_ok = False
@@ -173,27 +402,33 @@ class Actions(Action):
                     raise RuntimeError
         return all_ok
 
+    def call_action(self, action):
+        if isinstance(action, (Actions, Runner)):
+            return action()
+        ok = self.check_action(action)
+        if ok:
+            green(f'== {action.label}')
+        else:
+            ok = self.deploy_action(action)
+            if ok:
+                ok = self.check_action(action)
+                if ok:
+                    green(f'>> {action.label}')
+                else:
+                    red(f'XX {action.label}')
+        return ok
+
     def _call_(self, verbose):
         with logger.quiet():
-            with yellow(f'<> {self.label}'):
-                all_ok = True
-                for dpl in self.actions:
-                    action = self.get_action(dpl)
-                    if isinstance(action, (Actions, Runner)):
-                        ok = action()
-                    else:
-                        ok = self.check_action(action)
-                        if ok:
-                            green(f'== {action.label}')
-                        else:
-                            ok = self.deploy_action(action)
-                            if ok:
-                                ok = self.check_action(action)
-                                if ok:
-                                    green(f'>> {action.label}')
-                                else:
-                                    red(f'XX {action.label}')
-                    all_ok = all_ok and ok
+            all_ok = True
+            try:
+                with yellow(f'<> {self.label}'):
+                    for action, ok in self.schedule(self.call_action):
+                        all_ok = all_ok and ok
+            except DeadlineError as x:
+                error(x)
+                red(f'!! {self.label}')
+                raise
             if all_ok:
                 green(f'.. {self.label}')
                 return True
@@ -0,0 +1,33 @@
+class FactCache:
+    ''' Facts queried by checks during a run
+
+        keys are tuples : (kind, name, ..)
+        forgetting a key forgets all keys it prefixes
+    '''
+    def __init__(self):
+        self.facts = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, func, *a, **k):
+        try:
+            val = self.facts[key]
+        except KeyError:
+            self.misses += 1
+            val = self.facts[key] = func(*a, **k)
+        else:
+            self.hits += 1
+        return val
+
+    def forget(self, keys=None):
+        if keys is None:
+            self.facts.clear()
+            return
+        for key in keys:
+            size = len(key)
+            for known in list(self.facts):
+                if known[:size] == key:
+                    self.facts.pop(known, None)
+
+    def __str__(self):
+        return f'Facts({len(self.facts)}, hits={self.hits}, misses={self.misses})'
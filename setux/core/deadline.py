@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Event
+from time import monotonic
+
+from .errors import DeadlineError
+
+
+current = ContextVar('deadline', default=None)
+
+
+class Budget:
+    ''' Deadline shared by a deploy and its workers
+
+        cancel() stops every branch at its next check
+    '''
+    def __init__(self, seconds, outer=None):
+        self.end = monotonic() + seconds
+        if outer:
+            self.end = min(self.end, outer.end)
+        self.outer = outer
+        self.event = Event()
+
+    @property
+    def cancelled(self):
+        if self.event.is_set(): return True
+        return self.outer.cancelled if self.outer else False
+
+    def left(self):
+        return self.end - monotonic()
+
+    def cancel(self):
+        self.event.set()
+
+    def check(self, what):
+        if self.cancelled:
+            raise DeadlineError(what, 'cancelled')
+        if self.left() <= 0:
+            raise DeadlineError(what)
+
+    def __str__(self):
+        return f'Budget({max(self.left(), 0):.1f}s)'
+
+
+@contextmanager
+def budget(seconds):
+    ''' run the block within seconds
+        nested budgets can only shrink the outer one
+        the yielded Budget is the cancel handle, usable from any thread
+    '''
+    bud = Budget(seconds, current.get())
+    token = current.set(bud)
+    try:
+        yield bud
+    finally:
+        current.reset(token)
+
+
+def remaining():
+    ''' seconds left, None if no budget
+    '''
+    bud = current.get()
+    return None if bud is None else bud.left()
+
+
+def check(what):
+    bud = current.get()
+    if bud is not None:
+        bud.check(what)
+
+
+def bounded(what, timeout=None, signal='INT'):
+    ''' timeout command prefix, clamped to the remaining budget
+        () if neither
+    '''
+    bud = current.get()
+    if bud is not None:
+        bud.check(what)
+        left = bud.left()
+        timeout = min(timeout or left, left)
+        timeout = f'{timeout:.1f}' if timeout >= 0.1 else '0.1'
+    if not timeout: return ()
+    return ('timeout', '--signal', f'SIG{signal.upper()}', f'{timeout}s')
+
+
+def wrap(prefix, cmd, shell):
+    ''' (cmd, shell) run under prefix, as subprocess would run cmd
+        a shell command is bounded as a whole : prefix sh -c cmd
+    '''
+    if not prefix: return cmd, shell
+    if shell:
+        cmd = ['/bin/sh', '-c'] + ([cmd] if isinstance(cmd, str) else list(cmd))
+    return list(prefix) + list(cmd), False
@@ -30,6 +30,7 @@ class Distro:
     def __init__(self, target):
         self.name = self.__class__.__name__
         self.target = target
+        self.instances = dict()
         self.manager_plugins = plugins.Managers(self,
             Manager, setux.managers
         )
@@ -50,6 +51,19 @@ class Distro:
     def __str__(self):
         return f'Distro : {self.name}'
 
+    @property
+    def facts(self):
+        return self.target.facts
+
+    def module(self, cls):
+        ''' cls instance, reused for this distro
+        '''
+        try:
+            return self.instances[cls]
+        except KeyError:
+            module = self.instances[cls] = cls(self)
+            return module
+
     def reg_modules(self):
         for module in self.modules:
             name = getattr(module, 'register', None)
@@ -64,7 +78,7 @@ class Distro:
                     error(f'\n ! Action register Error !\n{self.target} has already a "{name}" attribute.\n')
                     return
                 setattr(self.target, name, action)
-                debug(f'{action} registred as {name}')
+                debug(lambda: f'{action} registred as {name}')
 
     def set_managers(self):
         for manager in self.manager_plugins:
@@ -87,7 +101,7 @@ class Distro:
                 dist = mapping.__name__
                 if mapping.pkg:
                     debug('Mapping %s Packages', dist)
-                    debug(' '.join(mapping.pkg.keys()))
+                    debug(lambda: ' '.join(mapping.pkg.keys()))
                     self.pkgmap.update(mapping.pkg)
                 for name, manager in self.managers.items():
                     if isinstance(manager, CommonPackager):
@@ -104,8 +118,7 @@ class Distro:
     @classmethod
     def release_default(cls, target):
         if target.release_infos is None:
-            ret, out, err = target.run('cat /etc/*-release', report='quiet', shell=True)
-            target.release_infos = dict(l.split('=') for l in out if '=' in l)
+            target.release_infos = target.facts.release
             debug('%s %s', target, target.release_infos)
         return target.release_infos
 
@@ -0,0 +1,60 @@
+from setux.logger import error
+
+from .parallel import pmap
+
+
+def state(action):
+    ''' SpecChecker.check convention :
+        True : conform, False : mismatch, None : absent
+    '''
+    if not hasattr(type(action), 'check'):
+        return 'skipped'
+    try:
+        ok = action.checked()
+    except Exception as x:
+        error(f'{action.label} ! {x}')
+        return 'error'
+    if ok is None: return 'absent'
+    return 'conform' if ok else 'mismatch'
+
+
+class Drift:
+    ''' Check only report
+    '''
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def select(self, state):
+        return [label for label, found in self.items if found==state]
+
+    @property
+    def ok(self):
+        return all(found in ('conform', 'skipped') for label, found in self.items)
+
+    def count(self):
+        counts = dict()
+        for label, found in self.items:
+            counts[found] = counts.get(found, 0) + 1
+        return counts
+
+    def __str__(self):
+        return '\n'.join(f'{found:>8} {label}' for label, found in self.items)
+
+
+def scan(action, workers=None):
+    ''' run every check of the action tree concurrently
+        nothing is deployed
+    '''
+    with action:
+        actions = list(action.leaves())
+        found = pmap(state, actions, workers)
+    return Drift([
+        (leaf.label, result)
+        for leaf, result in zip(actions, found)
+    ])
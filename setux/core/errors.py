@@ -39,3 +39,32 @@ class ExecError(SetuxError):
         super().__init__(
             f'{cmd} ! {ret} ! {out} {err}'
         )
+
+
+class DependencyError(SetuxError):
+    def __init__(self, items):
+        items = ', '.join(str(i) for i in items)
+        super().__init__(
+            f'dependency cycle between {items}'
+        )
+
+
+class TransferError(SetuxError):
+    def __init__(self, path, reason):
+        super().__init__(
+            f'transfer {path} ! {reason}'
+        )
+
+
+class DeadlineError(SetuxError):
+    def __init__(self, what, reason='deadline exceeded'):
+        super().__init__(
+            f'{what} ! {reason}'
+        )
+
+
+class OutputLimitError(SetuxError):
+    def __init__(self, cmd, size, limit):
+        super().__init__(
+            f'{cmd} ! raw output of {size} bytes past the {limit} bytes limit'
+        )
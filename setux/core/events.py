@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from json import dumps
+from logging import Formatter, FileHandler, getLogger, INFO
+from logging.handlers import QueueHandler, QueueListener
+from os import makedirs
+from os.path import dirname
+from queue import SimpleQueue
+from time import time, perf_counter
+
+
+class JsonFormatter(Formatter):
+    def format(self, record):
+        return dumps(record.msg, default=str)
+
+
+class EventLog:
+    ''' Structured events as JSON lines
+
+        events are queued by the deploy threads
+        and written by a background listener
+    '''
+    def __init__(self, path, target=None):
+        self.path = path
+        self.target = target
+        makedirs(dirname(path) or '.', exist_ok=True)
+        self.queue = SimpleQueue()
+        handler = QueueHandler(self.queue)
+        handler.setFormatter(JsonFormatter())
+        self.logger = getLogger(f'setux.events.{id(self)}')
+        self.logger.propagate = False
+        self.logger.setLevel(INFO)
+        self.logger.addHandler(handler)
+        self.file = FileHandler(path)
+        self.listener = QueueListener(self.queue, self.file)
+        self.listener.start()
+
+    def emit(self, event, **data):
+        data.update(event=event, time=time(), target=self.target)
+        self.logger.info(data)
+
+    @contextmanager
+    def span(self, event, **data):
+        ''' emit event.start, then event.end with duration
+            and the fields set on the yielded dict
+        '''
+        self.emit(f'{event}.start', **data)
+        start = perf_counter()
+        try:
+            yield data
+        finally:
+            data['duration'] = perf_counter() - start
+            self.emit(f'{event}.end', **data)
+
+    def close(self):
+        self.listener.stop()
+        self.file.close()
+        self.logger.handlers.clear()
+
+    def __str__(self):
+        return f'EventLog({self.path})'
@@ -0,0 +1,130 @@
+from threading import RLock
+
+from setux.logger import debug
+
+
+mark = '@@setux@@'
+
+
+def text(lines, status):
+    return '\n'.join(lines)
+
+def pairs(lines, status):
+    return dict(line.split('=', 1) for line in lines if '=' in line)
+
+def flag(lines, status):
+    return status == 0
+
+
+class Fact:
+    def __init__(self, name, command, parse=text):
+        self.name = name
+        self.command = command
+        self.parse = parse
+
+    def __str__(self):
+        return f'Fact({self.name} : {self.command})'
+
+
+declared = dict()
+
+
+def declare(name, command, parse=text):
+    ''' register a host fact
+        parse(lines, status) -> value
+    '''
+    declared[name] = Fact(name, command, parse)
+
+
+declare('release',  'cat /etc/*-release', pairs)
+declare('hostname', 'hostname')
+declare('kernel',   'uname -r')
+declare('arch',     'uname -m')
+declare('user',     'id -un')
+declare('rsync',    'command -v rsync', flag)
+declare('python',   'command -v python3', flag)
+
+
+class Facts:
+    ''' Host facts, gathered in a single round trip
+
+        the first missing fact fetches all the declared ones
+        refresh / invalidate to fetch them again
+    '''
+    def __init__(self, target):
+        self.target = target
+        self.known = dict()
+        self.lock = RLock()
+
+    def script(self, facts):
+        lines = []
+        for fact in facts:
+            lines.append(f"echo '{mark}{fact.name}'")
+            lines.append(f'{{ {fact.command} ; }} 2>/dev/null')
+            lines.append(f'echo "{mark}$?"')
+        return '\n'.join(lines)+'\n'
+
+    def sections(self, out):
+        name, lines = None, []
+        for line in out:
+            if not line.startswith(mark):
+                if name: lines.append(line)
+                continue
+            tag = line[len(mark):]
+            if name and tag.isdigit():
+                yield name, lines, int(tag)
+                name = None
+            else:
+                name, lines = tag, []
+
+    def gather(self, names=None):
+        ''' fetch names (all declared if None)
+        '''
+        facts = [declared[name] for name in names or declared]
+        with self.lock:
+            ret, out, err = self.target.run(
+                'sh',
+                input = self.script(facts).encode(),
+                report = 'quiet',
+                critical = False,
+                limit = 0,
+                term = False,
+            )
+            found = {
+                name : (lines, status)
+                for name, lines, status in self.sections(out or [])
+            }
+            for fact in facts:
+                lines, status = found.get(fact.name, ([], 127))
+                self.known[fact.name] = fact.parse(lines, status)
+        debug(lambda: f'{self.target} facts : {", ".join(f.name for f in facts)}')
+
+    def get(self, name):
+        try:
+            return self.known[name]
+        except KeyError:
+            with self.lock:
+                if name not in self.known:
+                    missing = [n for n in declared if n not in self.known]
+                    self.gather(missing or [name])
+            return self.known[name]
+
+    def __getattr__(self, name):
+        if name in declared:
+            return self.get(name)
+        raise AttributeError(name)
+
+    def invalidate(self, names=None):
+        with self.lock:
+            if names is None:
+                self.known.clear()
+            else:
+                for name in [names] if isinstance(names, str) else names:
+                    self.known.pop(name, None)
+
+    def refresh(self, names=None):
+        self.invalidate(names)
+        self.gather(names)
+
+    def __str__(self):
+        return f'Facts({", ".join(self.known)})'
@@ -0,0 +1,149 @@
+from base64 import b64encode
+from json import dumps, loads
+from subprocess import Popen, PIPE
+from threading import Lock
+
+from setux.logger import debug, error
+
+from .output import Output
+from .errors import OutputLimitError
+from . import deadline
+
+
+server = '''
+import base64, json, shutil, socket, subprocess, sys
+print(json.dumps(dict(host=socket.gethostname())), flush=True)
+for line in sys.stdin:
+    req = json.loads(line)
+    args = ' '.join(req['args']) if req['shell'] else req['args']
+    data = base64.b64decode(req['input']) if req['input'] else None
+    bound = req['bound']
+    def run(args, shell):
+        if bound:
+            if shell:
+                args = ['/bin/sh', '-c'] + ([args] if isinstance(args, str) else args)
+            args, shell = bound + args, False
+        return subprocess.run(args, shell=shell, input=data,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        try:
+            if bound and not req['shell'] and not shutil.which(args[0]):
+                raise OSError(args[0])
+            proc = run(args, req['shell'])
+        except OSError:
+            proc = run(' '.join(req['args']), True)
+        out, err, size = proc.stdout, proc.stderr, len(proc.stdout)
+        limit = req['limit']
+        if limit and size > limit:
+            half = limit // 2
+            out = out[:half] + b'\\n...\\n' + out[-half:]
+        if limit and len(err) > limit:
+            half = limit // 2
+            err = err[:half] + b'\\n...\\n' + err[-half:]
+        res = dict(ret=proc.returncode, size=size,
+            out=out.decode('utf-8', 'replace'),
+            err=err.decode('utf-8', 'replace'))
+    except Exception as x:
+        res = dict(ret=-1, size=0, out='', err=str(x))
+    print(json.dumps(res), flush=True)
+'''
+
+boot = ['python3', '-u', '-c', 'import sys,json;exec(json.loads(sys.stdin.readline()))']
+
+
+class Helper:
+    ''' Persistent privileged process
+
+        runs the commands of one user over a pipe,
+        without a sudo startup per command
+    '''
+    def __init__(self, target, user, proc):
+        self.target = target
+        self.user = user
+        self.proc = proc
+        self.lock = Lock()
+
+    @classmethod
+    def start(cls, target, user):
+        cmd = target.helper_cmd(user)
+        if not cmd: return None
+        try:
+            proc = Popen(cmd, stdin=PIPE, stdout=PIPE, stderr=PIPE, text=True)
+            proc.stdin.write(dumps(server)+'\n')
+            proc.stdin.flush()
+            hello = loads(proc.stdout.readline() or 'null')
+        except Exception as x:
+            error(f'helper {user} ! {x}')
+            return None
+        if not hello or hello.get('host') != target.facts.hostname:
+            error(f'helper {user} ! not started on {target}')
+            proc.kill()
+            proc.wait()
+            return None
+        debug(f'helper {user} on {target}')
+        return cls(target, user, proc)
+
+    def run(self, *arg, **kw):
+        ''' same (ret, out, err) as target.run
+            profiled, recorded and emitted as target.run(sudo=user)
+        '''
+        kw.pop('term', None)
+        kw.pop('shared', None)
+        kw.pop('spill', None)
+        args, kw = self.target.parse(*arg, **kw)
+        return self.target.observed(
+            self.target.sudo_args(args, self.user), kw,
+            lambda: self.do_run(args, **kw),
+        )
+
+    def do_run(self, args, report='normal', critical=True, raw=False, skip=None, input=None,
+        timeout=None, signal='INT', limit=None, **kw):
+        ''' the output is clipped in the helper, never spilled
+        '''
+        command = ' '.join(str(a) for a in args)
+        bound = deadline.bounded(command, timeout, signal)
+        limit = limit if limit is not None else self.target.output_limit
+        request = dumps(dict(
+            args = [str(a) for a in args],
+            shell = bool(kw.get('shell')),
+            bound = list(bound),
+            input = b64encode(input).decode() if input else None,
+            limit = limit or None,
+        ))
+        with self.lock:
+            try:
+                self.proc.stdin.write(request+'\n')
+                self.proc.stdin.flush()
+                response = loads(self.proc.stdout.readline())
+            except Exception as x:
+                error(f'helper {self.user} ! {command} ! {x}')
+                return -1, 'ERROR', str(x)
+
+        ret, size = response['ret'], response['size']
+        clipped = bool(limit) and size > limit
+        if clipped and raw:
+            raise OutputLimitError(command, size, limit)
+        out = response['out'].strip()
+        if out:
+            if report!='quiet':
+                debug("%s [out]:\n%s", command, out)
+            if not raw:
+                out = [i.strip() for i in out.split('\n')]
+                if skip:
+                    out = [i for i in out if not skip(i)]
+                if limit:
+                    out = Output(out, size, min(size, limit))
+        err = response['err'].strip()
+        if err and not raw:
+            err = [i.strip() for i in err.split('\n')]
+            if skip:
+                err = [i for i in err if not skip(i)]
+        return ret, out, err
+
+    def close(self):
+        with self.lock:
+            self.proc.stdin.close()
+            self.proc.wait()
+
+    def __str__(self):
+        return f'Helper({self.user}@{self.target})'
@@ -0,0 +1,95 @@
+from hashlib import sha256
+from json import load, dump
+from os import fdopen, makedirs, replace, unlink
+from os.path import basename, dirname
+from tempfile import mkstemp
+from threading import RLock
+from time import time
+
+
+plain = (str, int, float, bool, type(None))
+
+
+def stable(value):
+    ''' repr of value, without object addresses
+    '''
+    if isinstance(value, plain):
+        return repr(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [stable(v) for v in value]
+        if isinstance(value, (set, frozenset)): items.sort()
+        return f'[{", ".join(items)}]'
+    if isinstance(value, dict):
+        items = sorted(f'{stable(k)}: {stable(v)}' for k, v in value.items())
+        return f'{{{", ".join(items)}}}'
+    cls = type(value)
+    if cls.__str__ is not object.__str__:
+        return str(value)
+    return f'{cls.__module__}.{cls.__qualname__}'
+
+
+def fingerprint(*parts):
+    return sha256('\n'.join(stable(p) for p in parts).encode()).hexdigest()
+
+
+class Journal:
+    ''' Converged actions of a target
+
+        actions whose fingerprint is unchanged
+        and converged less than fresh seconds ago
+        can be skipped
+
+        records are kept in memory until save()
+    '''
+    def __init__(self, path, fresh=3600):
+        self.path = path
+        self.fresh = fresh
+        self.lock = RLock()
+        self.dirty = False
+        try:
+            with open(path) as src:
+                self.entries = load(src)
+        except (OSError, ValueError):
+            self.entries = dict()
+
+    def converged(self, key, digest):
+        with self.lock:
+            entry = self.entries.get(key)
+        return bool(
+            entry
+            and entry['ok']
+            and entry['digest']==digest
+            and time() - entry['time'] < self.fresh
+        )
+
+    def record(self, key, digest, ok):
+        with self.lock:
+            self.entries[key] = dict(digest=digest, ok=bool(ok), time=time())
+            self.dirty = True
+
+    def forget(self, key=None):
+        with self.lock:
+            if key:
+                self.entries.pop(key, None)
+            else:
+                self.entries = dict()
+            self.dirty = True
+            self.save()
+
+    def save(self):
+        with self.lock:
+            if not self.dirty: return
+            root = dirname(self.path) or '.'
+            makedirs(root, exist_ok=True)
+            fd, tmp = mkstemp(dir=root, prefix=f'.{basename(self.path)}.')
+            try:
+                with fdopen(fd, 'w') as dst:
+                    dump(self.entries, dst)
+                replace(tmp, self.path)
+            except BaseException:
+                unlink(tmp)
+                raise
+            self.dirty = False
+
+    def __str__(self):
+        return f'Journal({self.path})'
@@ -1,8 +1,9 @@
-from logging import FileHandler
+from logging import FileHandler, DEBUG
 from enum import Enum
 from contextlib import contextmanager
-
-from pybrary.func import caller
+from os.path import basename, splitext
+from sys import _getframe, exc_info
+from threading import local
 
 
 class Verbosity(Enum):
@@ -11,6 +12,22 @@ class Verbosity(Enum):
     verbose = 2
 
 
+sites = dict()
+
+
+def site(frame):
+    ''' module.function:line of frame, cached per call site
+    '''
+    key = frame.f_code, frame.f_lineno
+    try:
+        return sites[key]
+    except KeyError:
+        code = frame.f_code
+        module = splitext(basename(code.co_filename))[0]
+        found = sites[key] = f'{module}.{code.co_name}:{frame.f_lineno}'
+        return found
+
+
 class Logger:
     def __init__(self, logger, verbosity=None):
         self.logger = logger
@@ -26,10 +43,16 @@ class Logger:
             self.verbosity = back
 
     def debug(self, *a):
+        ''' debug(fmt, *args) : formatted by logging if enabled
+            debug(msg) : msg may be a callable, only called if enabled
+        '''
+        if not self.logger.isEnabledFor(DEBUG): return
         if len(a)>1:
             self.logger.debug(*a)
         else:
-            self.logger.debug(f'{caller()} -> {a[0]}')
+            msg = a[0]
+            if callable(msg): msg = msg()
+            self.logger.debug(f'{site(_getframe(1))} -> {msg}')
 
     def info(self, *a):
         if self.verbosity.value < Verbosity.normal.value:
@@ -37,11 +60,12 @@ class Logger:
         else:
             self.logger.info(*a)
 
-    def error(self, *a):
-        self.logger.error(*a)
+    def error(self, *a, **k):
+        if not kept(self.error, *a, **k):
+            self.logger.error(*a, **k)
 
     def exception(self, *a):
-        self.logger.exception(*a)
+        self.error(*a, exc_info=exc_info())
 
     def logs(self, level='info'):
         for h in self.logger.handlers:
@@ -53,6 +77,36 @@ class Logger:
         return str(self.logger)
 
 
+threads = local()
+
+
+def kept(func, *a, **k):
+    ''' buffer func(*a, **k) if the current thread is captured
+    '''
+    records = getattr(threads, 'records', None)
+    if records is None: return False
+    records.append((func, a, k))
+    return True
+
+
+@contextmanager
+def captured():
+    ''' buffer Deploy output and errors of the current thread
+        with indentation relative to the capture
+    '''
+    back = getattr(threads, 'records', None), getattr(threads, 'tab', 0)
+    threads.records, threads.tab = list(), 0
+    try:
+        yield threads.records
+    finally:
+        threads.records, threads.tab = back
+
+
+def replay(records):
+    for func, a, k in records:
+        func(*a, **k)
+
+
 class Deploy:
     g = "\x1b[32;1m"
     y = "\x1b[33;1m"
@@ -62,11 +116,26 @@ class Deploy:
     def __init__(self, logger, setux):
         self.setux = setux
         self.logger = logger
-        self.tab = 0
 
-    def info(self, col, msg):
+    @property
+    def tab(self):
+        return getattr(threads, 'tab', 0)
+
+    @tab.setter
+    def tab(self, val):
+        threads.tab = val
+
+    def info(self, col, msg, tab=None):
+        tab = self.tab if tab is None else tab
+        if not kept(self.replayed, col, msg, tab):
+            self.emit(col, msg, tab)
+
+    def replayed(self, col, msg, tab):
+        self.info(col, msg, self.tab + tab)
+
+    def emit(self, col, msg, tab):
         self.setux.info(msg)
-        msg = f'{" "*4*self.tab}{col}{msg[3:]}{self.z}'
+        msg = f'{" "*4*tab}{col}{msg[3:]}{self.z}'
         self.logger.info(msg)
 
     def green(self, msg):
@@ -76,15 +145,19 @@ class Deploy:
     def yellow(self, msg):
         self.info(self.y, msg)
         self.tab+=1
-        yield
-        self.tab-=1
+        try:
+            yield
+        finally:
+            self.tab-=1
 
     @contextmanager
     def silent(self, msg):
         self.logger.debug(msg)
         self.tab+=1
-        yield
-        self.tab-=1
+        try:
+            yield
+        finally:
+            self.tab-=1
 
     def red(self, msg):
         self.info(self.r, msg)
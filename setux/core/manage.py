@@ -20,7 +20,7 @@ class Manager:
 
     def run(self, *a, **k):
         k.setdefault('sudo', self.sudo)
-        return self.target.run(*a, **k)
+        return self.target.run_as(*a, **k)
 
     @staticmethod
     def is_supported(distro):
@@ -65,6 +65,9 @@ class Checker(Manager, Action):
         super().__call__(verbose=verbose)
         return self
 
+    def depends(self):
+        return self.key, self.args, self.spec
+
     def validate(self, specs):
         return {
             k: v
@@ -98,13 +101,25 @@ class SpecChecker(Checker):
             self.cre()
             found = self.get()
             if not found: return False
-        for k, v in self.spec.items():
-            if not self.chk(k, found.get(k), v):
-                self.mod(k, v)
-                found = self.get()
-                if not self.chk(k, found.get(k), v):
-                    return False
-        return True
+        changes = {
+            k : v
+            for k, v in self.spec.items()
+            if not self.chk(k, found.get(k), v)
+        }
+        if not changes: return True
+        self.mod_many(changes)
+        found = self.get()
+        return all(
+            self.chk(k, found.get(k), v)
+            for k, v in changes.items()
+        )
+
+    def mod_many(self, changes):
+        ''' apply {name : value} changes
+            to be overridden by a single command
+        '''
+        for k, v in changes.items():
+            self.mod(k, v)
 
 
 class ArgsChecker(Checker):
@@ -120,19 +135,27 @@ class ArgsChecker(Checker):
     def remove(self, args=None, found=None):
         args = args or self.args
         found = found or self.get()
-        ok = True
-        for arg in found:
-            if arg in args:
-                ok = ok and self.rm(arg)
-        return ok
+        return self.rm_many([arg for arg in found if arg in args])
 
     def extend(self, args=None, found=None):
         args = args or self.args
         found = found or self.get()
+        return self.add_many([arg for arg in args if arg not in found])
+
+    def rm_many(self, args):
+        ''' to be overridden by a single command
+        '''
+        ok = True
+        for arg in args:
+            ok = ok and self.rm(arg)
+        return ok
+
+    def add_many(self, args):
+        ''' to be overridden by a single command
+        '''
         ok = True
         for arg in args:
-            if arg not in found:
-                ok = ok and self.add(arg)
+            ok = ok and self.add(arg)
         return ok
 
     def deploy(self):
@@ -1,10 +1,13 @@
 from inspect import cleandoc, getsource
 from ast import parse, walk, Call
+from functools import lru_cache
 from textwrap import dedent
 
 from pybrary.func import todo
 
 from setux.logger import error, debug
+from .parallel import levels
+from . import deadline
 
 
 def inst(installer, installables):
@@ -18,6 +21,97 @@ def inst(installer, installables):
             installer(installable)
 
 
+def module_name(cls):
+    return '.'.join(cls.__module__.split('.')[2:]) or cls.__name__
+
+
+@lru_cache(maxsize=None)
+def deployed(cls):
+    ''' names of the modules deployed by cls
+        parsed once from deploy / do_deploy sources
+    '''
+    names = list()
+    for klass in cls.mro():
+        if klass is Module or not issubclass(klass, Module): continue
+        for meth in ('deploy', 'do_deploy'):
+            if meth not in klass.__dict__: continue
+            try:
+                tree = parse(dedent(getsource(klass.__dict__[meth])))
+            except (OSError, TypeError, SyntaxError):
+                continue
+            for node in walk(tree):
+                if isinstance(node, Call):
+                    try:
+                        f = node.func.attr
+                        if f in ('deploy', 'do_deploy'):
+                            m = node.args[0].value
+                            if isinstance(m, str) and m not in names:
+                                names.append(m)
+                    except: pass
+    return tuple(names)
+
+
+class ModuleGraph:
+    ''' Modules dependencies
+        from their deploy('module') calls
+    '''
+    def __init__(self, modules):
+        self.deps = {
+            name : [
+                sub
+                for sub in deployed(cls)
+                if sub in modules and sub != name
+            ]
+            for name, cls in modules.items()
+        }
+        self.rdeps = {name : [] for name in modules}
+        for name, deps in self.deps.items():
+            for dep in deps:
+                self.rdeps[dep].append(name)
+
+    @staticmethod
+    def closure(edges, name):
+        found, pending = list(), list(edges.get(name, ()))
+        while pending:
+            item = pending.pop()
+            if item not in found:
+                found.append(item)
+                pending.extend(edges.get(item, ()))
+        return found
+
+    def transitive(self, name):
+        ''' all modules deployed by name
+        '''
+        return self.closure(self.deps, name)
+
+    def dependents(self, name):
+        ''' all modules deploying name
+        '''
+        return self.closure(self.rdeps, name)
+
+    def levels(self, names=None):
+        ''' names and their deps, by levels
+            modules of a level are independent
+        '''
+        if names is None:
+            names = list(self.deps)
+        else:
+            names = list(names)
+            for name in list(names):
+                names.extend(d for d in self.transitive(name) if d not in names)
+        return list(levels(names, self.deps))
+
+    def order(self, names=None):
+        ''' topological order, deps first
+        '''
+        return [name for level in self.levels(names) for name in level]
+
+
+@lru_cache(maxsize=None)
+def module_graph(modules):
+    return ModuleGraph(dict(modules))
+
+
 class Module:
     def __init__(self, distro):
         self.distro = distro
@@ -26,13 +120,29 @@ class Module:
         return getattr(self.distro.target, attr)
 
     def deploy(self, target, **kw):
-        for mod in (
-            c
-            for c in reversed(self.__class__.mro())
-            if issubclass(c, Module)
-        ):
+        return self.deploy_chain(target, **kw)
+
+    @classmethod
+    def chain(cls):
+        ''' do_deploy of each Module class in the MRO, base first
+            computed once per class
+        '''
+        try:
+            return cls.__dict__['_chain_']
+        except KeyError:
+            chain = tuple(
+                c.do_deploy
+                for c in reversed(cls.mro())
+                if issubclass(c, Module)
+            )
+            cls._chain_ = chain
+            return chain
+
+    def deploy_chain(self, target, **kw):
+        for do_deploy in self.chain():
+            deadline.check(module_name(type(self)))
             try:
-                ret = mod.do_deploy(self, target, **kw)
+                ret = do_deploy(self, target, **kw)
             except Exception as x:
                 error(x)
                 return False
@@ -46,20 +156,8 @@ class Module:
 
     @property
     def submodules(self):
-        subs = list()
-        modules = set(self.modules.items.keys())
-        for meth in (self.deploy, self.do_deploy):
-            tree = parse(dedent(getsource(meth)))
-            for node in walk(tree):
-                if isinstance(node, Call):
-                    try:
-                        f = node.func.attr
-                        if f in ('deploy', 'do_deploy'):
-                            m = node.args[0].s
-                            if m in modules:
-                                subs.append(m)
-                    except: pass
-        return subs
+        modules = self.modules.items
+        return [m for m in deployed(type(self)) if m in modules]
 
     def install(self, target, *, pre=None, dep=None, pkg=None, **specs):
         inst(target.Package.install, pre)
@@ -0,0 +1,73 @@
+from os import unlink
+from subprocess import run
+from tempfile import NamedTemporaryFile, TemporaryFile
+
+
+class Output(list):
+    ''' Output lines of a command run with a limit
+
+        past the limit only its head and tail are kept
+        size : full output size (bytes)
+        kept : captured size (bytes)
+        path : full output, if spilled to disk
+    '''
+    def __init__(self, lines=(), size=0, kept=0, path=None):
+        super().__init__(lines)
+        self.size = size
+        self.kept = kept
+        self.path = path
+
+    @property
+    def truncated(self):
+        return self.kept < self.size
+
+    def lines(self):
+        ''' all the output lines, read from disk if spilled
+        '''
+        if not self.path:
+            yield from self
+            return
+        with open(self.path, errors='replace') as src:
+            for line in src:
+                yield line.strip()
+
+    def remove(self):
+        if self.path:
+            unlink(self.path)
+            self.path = None
+
+
+def clip(file, limit):
+    ''' head and tail of file, within limit bytes
+    '''
+    size = file.seek(0, 2)
+    file.seek(0)
+    if size <= limit:
+        return file.read(), size
+    half = limit // 2
+    head = file.read(half)
+    file.seek(size - half)
+    return head + b'\n...\n' + file.read(), size
+
+
+def capture(cmd, limit, spill=False, **kw):
+    ''' run cmd with its output written to files instead of memory
+        stdout / stderr are clipped to limit bytes
+        the full stdout is kept in proc.path if spill
+    '''
+    out = NamedTemporaryFile(prefix='setux-out-', delete=False)
+    try:
+        with out, TemporaryFile() as err:
+            proc = run(cmd, stdout=out, stderr=err, **kw)
+            proc.stdout, proc.size = clip(out, limit)
+            proc.stderr, _ = clip(err, limit)
+    except BaseException:
+        unlink(out.name)
+        raise
+    proc.kept = min(proc.size, limit)
+    if spill and proc.size > limit:
+        proc.path = out.name
+    else:
+        proc.path = None
+        unlink(out.name)
+    return proc
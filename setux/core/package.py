@@ -1,3 +1,7 @@
+from os import makedirs, stat
+from threading import RLock
+from time import time
+
 from pybrary.func import todo
 
 from setux.logger import error, info
@@ -12,12 +16,30 @@ class _Packager(Manager):
         self.done = set()
         self.ready = False
         self._installed = None
+        self.generation = 0
+        self.lock = RLock()
 
     def _get_ready_(self):
         if self.ready: return
-        self.do_init()
-        self.mapkg = {v:k for k,v in self.pkgmap.items()}
-        self.ready = True
+        with self.lock:
+            if self.ready: return
+            self.do_init()
+            self.mapkg = {v:k for k,v in self.pkgmap.items()}
+            self.ready = True
+
+    def invalidate(self):
+        ''' forget the installed packages
+        '''
+        with self.lock:
+            self.generation += 1
+            self._installed = None
+
+    def load_installed(self, generation):
+        installed = list(self.do_installed())
+        with self.lock:
+            if generation == self.generation:
+                self._installed = installed
+        return installed
 
     def filter(self, do_fetch, pattern=None):
         self._get_ready_()
@@ -32,11 +54,16 @@ class _Packager(Manager):
 
 
     def installed(self, pattern=None):
-        if not self._installed:
-            self._installed = list(self.do_installed())
+        installed = self._installed
+        if installed is None:
+            generation = self.generation
+            installed = self.target.flight.do(
+                ('installed', self.manager, generation),
+                self.load_installed, generation,
+            )
 
         def do_installed(_pattern):
-            yield from self._installed
+            yield from installed
 
         yield from self.filter(do_installed, pattern)
 
@@ -69,16 +96,19 @@ class _Packager(Manager):
         self._get_ready_()
         info('\tupgrade')
         self.do_upgrade()
-        self._installed = None
+        self.invalidate()
 
     def install_pkg(self, name, ver=None):
-        if name in self.done: return
+        with self.lock:
+            if name in self.done: return
+            self.done.add(name)
         self._get_ready_()
         info('\t--> %s', name)
-        self.done.add(name)
         pkg = self.pkgmap.get(name, name)
-        self._installed = None
-        return self.do_install(pkg, ver)
+        try:
+            return self.do_install(pkg, ver)
+        finally:
+            self.invalidate()
 
     def install(self, name, ver=None, verbose=True):
         try:
@@ -91,10 +121,13 @@ class _Packager(Manager):
     def remove_pkg(self, name):
         self._get_ready_()
         info('\t<-- %s', name)
-        self.done.discard(name)
+        with self.lock:
+            self.done.discard(name)
         pkg = self.pkgmap.get(name, name)
-        self._installed = None
-        return self.do_remove(pkg)
+        try:
+            return self.do_remove(pkg)
+        finally:
+            self.invalidate()
 
     def remove(self, name, verbose=True):
         try:
@@ -108,7 +141,7 @@ class _Packager(Manager):
         self._get_ready_()
         info('\tcleanup')
         self.do_cleanup()
-        self._installed = None
+        self.invalidate()
 
     def do_init(self): todo(self)
     def do_update(self): todo(self)
@@ -135,13 +168,26 @@ class CommonPackager(_Packager):
         self.cache_file = f'{self.cache_dir}/{self.manager}'
         self.cache_days = 10
 
-    def do_installable(self, pattern):
-        from setux.targets import Local
-        local = Local(outdir=self.cache_dir)
-        cache = local.file(self.cache_file)
-        if cache.age is None or cache.size==0 or cache.age > self.cache_days:
-            self.do_installable_cache()
+    def fresh_cache(self):
+        ''' rebuild the installable cache if missing, empty or stale
+        '''
+        def refresh():
+            makedirs(self.cache_dir, exist_ok=True)
+            try:
+                cache = stat(self.cache_file)
+            except FileNotFoundError:
+                cache = None
+            if (
+                cache is None
+                or cache.st_size==0
+                or (time() - cache.st_mtime) // 86400 > self.cache_days
+            ):
+                self.do_installable_cache()
+
+        self.target.flight.do(('cache', self.manager), refresh)
 
+    def do_installable(self, pattern):
+        self.fresh_cache()
         for line in open(self.cache_file):
             yield line.strip().split(maxsplit=1)
 
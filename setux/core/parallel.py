@@ -0,0 +1,78 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from threading import Lock
+
+from .errors import DependencyError
+
+
+def levels(items, after=None):
+    ''' split items in successive levels
+        after : {item : items it must follow}
+        items of a level only follow items of previous levels
+    '''
+    after = after or dict()
+    pending = list(items)
+    known = set(pending)
+    done = set()
+    while pending:
+        level = [
+            item
+            for item in pending
+            if all(
+                dep in done or dep not in known
+                for dep in after.get(item, ())
+            )
+        ]
+        if not level:
+            raise DependencyError(pending)
+        yield level
+        done.update(level)
+        pending = [item for item in pending if item not in done]
+
+
+max_workers = 32
+
+
+def pmap(func, items, workers=None):
+    ''' ordered results of func(item) run concurrently
+        in a copy of the caller's context
+        at most workers (default max_workers) at a time
+    '''
+    items = list(items)
+    if len(items) < 2 or workers==1:
+        return [func(item) for item in items]
+    contexts = [copy_context() for _ in items]
+    with ThreadPoolExecutor(min(workers or max_workers, len(items))) as pool:
+        return list(pool.map(
+            lambda ctx, item: ctx.run(func, item),
+            contexts, items,
+        ))
+
+
+class SingleFlight:
+    ''' concurrent calls with the same key
+        share a single execution and its result
+    '''
+    def __init__(self):
+        self.lock = Lock()
+        self.calls = dict()
+
+    def do(self, key, func, *a, **k):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            result = func(*a, **k)
+        except BaseException as x:
+            call.set_exception(x)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
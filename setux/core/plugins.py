@@ -10,18 +10,19 @@ from pybrary.modules import load
 from setux.logger import debug, info, error
 
 import setux.core
+from .module import module_graph
 
 
 @lru_cache()
 def get_modules(ns):
-    debug(f'{ns.__name__}')
+    debug(lambda: ns.__name__)
     path, name = ns.__path__, ns.__name__ + '.'
     try:
         fil = None
         if hasattr(path, '_path'):                   # namespace
             found = list()
             for pth in path._path:
-                debug(f'    {pth}')
+                debug(lambda: f'    {pth}')
                 for fil in find(pth, r'\.py$'):
                     if fil.name=='__init__.py':
                         error(f' ! __init__ in ns {pth}')
@@ -85,7 +86,7 @@ class Plugins:
                 self.items[key] = val
         self.sort()
         for mod in self:
-            debug('%s registred', fqn(mod))
+            debug(lambda: f'{fqn(mod)} registred')
 
 
 class Distros(Plugins):
@@ -119,7 +120,12 @@ class DistroPlugins(Plugins):
         return None, None
 
 
-class Modules(DistroPlugins): pass
+class Modules(DistroPlugins):
+    @property
+    def graph(self):
+        ''' dependency graph, shared by identical plugin sets
+        '''
+        return module_graph(tuple(sorted(self.items.items())))
 
 
 class Managers(DistroPlugins): pass
@@ -0,0 +1,86 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from json import dumps
+from threading import Lock
+from time import perf_counter
+
+
+class Span:
+    def __init__(self, name):
+        self.name = name
+        self.duration = 0
+        self.children = list()
+
+    @property
+    def own(self):
+        return self.duration - sum(c.duration for c in self.children)
+
+    def as_dict(self):
+        return dict(
+            name = self.name,
+            duration = round(self.duration, 6),
+            children = [c.as_dict() for c in self.children],
+        )
+
+
+class Profiler:
+    ''' Nested timing tree
+        action -> sub action -> module -> command
+    '''
+    def __init__(self, name='setux'):
+        self.root = Span(name)
+        self.stack = ContextVar(f'profile_{id(self)}', default=(self.root,))
+        self.lock = Lock()
+        self.start = perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        stack = self.stack.get()
+        node = Span(name)
+        with self.lock:
+            stack[-1].children.append(node)
+        token = self.stack.set(stack + (node,))
+        start = perf_counter()
+        try:
+            yield node
+        finally:
+            node.duration += perf_counter() - start
+            self.stack.reset(token)
+
+    def stop(self):
+        self.root.duration = perf_counter() - self.start
+
+    def collapsed(self):
+        ''' flamegraph collapsed stacks, in microseconds
+        '''
+        stacks = dict()
+        def walk(node, path):
+            name = ' '.join(node.name.replace(';', ',').split())[:80]
+            path = f'{path};{name}' if path else name
+            stacks[path] = stacks.get(path, 0) + max(node.own, 0)
+            for child in node.children:
+                walk(child, path)
+        walk(self.root, '')
+        return '\n'.join(
+            f'{path} {int(us * 1e6)}'
+            for path, us in stacks.items()
+            if int(us * 1e6)
+        )
+
+    def json(self):
+        return dumps(self.root.as_dict(), indent=1)
+
+    def save(self, path):
+        ''' .json : timing tree, else collapsed stacks
+        '''
+        with open(path, 'w') as dst:
+            dst.write(self.json() if path.endswith('.json') else self.collapsed())
+            dst.write('\n')
+
+
+def profiled(target, name):
+    ''' name : str or callable, only called when profiling
+    '''
+    profiler = getattr(target, 'profiler', None)
+    if profiler is None: return nullcontext()
+    return profiler.span(name() if callable(name) else name)
@@ -0,0 +1,71 @@
+from time import monotonic, sleep
+
+from pybrary.func import todo
+
+from .deadline import remaining
+
+
+def poll(check, deadline=30, first=0.005, factor=2, cap=0.5):
+    ''' call check() until it's true or deadline (seconds) is reached
+        delay between calls grows from first to cap
+        bounded by the current budget
+    '''
+    left = remaining()
+    if left is not None:
+        deadline = min(deadline, left)
+    end = monotonic() + deadline
+    delay = first
+    while True:
+        if check(): return True
+        left = end - monotonic()
+        if left <= 0: return False
+        sleep(min(delay, left))
+        delay = min(delay * factor, cap)
+
+
+class Probe:
+    ''' Readiness probe
+        checked on the target once the service is active
+    '''
+    def __call__(self, target):
+        return target.check(self.command(), report='quiet', critical=False, shared=True)
+
+    def command(self): todo(self)
+
+    def __str__(self):
+        return f'{self.__class__.__name__}({self.command()})'
+
+
+class Port(Probe):
+    def __init__(self, port, host='127.0.0.1'):
+        self.port = port
+        self.host = host
+
+    def command(self):
+        return f"timeout 1 bash -c 'exec 3<>/dev/tcp/{self.host}/{self.port}'"
+
+
+class Socket(Probe):
+    def __init__(self, path):
+        self.path = path
+
+    def command(self):
+        return f'test -S {self.path}'
+
+
+class Http(Probe):
+    def __init__(self, port, path='/', host='127.0.0.1'):
+        self.port = port
+        self.path = path
+        self.host = host
+
+    def command(self):
+        return f'curl -sf -o /dev/null --max-time 1 http://{self.host}:{self.port}{self.path}'
+
+
+class Command(Probe):
+    def __init__(self, cmd):
+        self.cmd = cmd
+
+    def command(self):
+        return self.cmd
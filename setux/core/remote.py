@@ -0,0 +1,66 @@
+''' In process module execution on the target
+
+    $ PYTHONPATH=<export path> python3 -m setux.core.remote <invocation.json>
+
+    invocation : {"name": target name, "module": name, "kwargs": {..}}
+    every log record and the final result
+    are written on stdout as JSON lines
+'''
+from json import load, loads, dumps
+from logging import Handler, getLogger
+from sys import argv, exit as sys_exit
+from time import time
+
+
+def event(kind, **data):
+    data.update(event=kind, time=time())
+    print(dumps(data, default=str), flush=True)
+
+
+def events(lines):
+    ''' parse event lines, skip anything else
+    '''
+    for line in lines:
+        if line.startswith('{'):
+            try:
+                yield loads(line)
+            except ValueError:
+                pass
+
+
+class Events(Handler):
+    def emit(self, record):
+        event('log',
+            logger = record.name,
+            level = record.levelname,
+            msg = record.getMessage(),
+        )
+
+
+def main(path):
+    with open(path) as src:
+        call = load(src)
+
+    from setux.logger import logger
+    handler = Events()
+    for name in ('Setux', 'Deploy'):
+        getLogger(name).handlers = [handler]
+
+    from setux.targets import Local
+    start = time()
+    try:
+        target = Local(name=call.get('name', 'remote'))
+        ok = target.deploy(call['module'], **call.get('kwargs', dict()))
+    except Exception as x:
+        event('error', msg=str(x))
+        ok = False
+    event('result',
+        module = call['module'],
+        ok = bool(ok),
+        duration = time() - start,
+    )
+    return 0 if ok else 1
+
+
+if __name__=='__main__':
+    sys_exit(main(argv[1]))
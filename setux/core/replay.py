@@ -0,0 +1,55 @@
+from threading import Lock
+from time import sleep
+
+from setux.logger import error
+
+from .target import CoreTarget
+from .transcript import load, command
+
+
+class Replay:
+    ''' Answer run from a recorded transcript
+
+        mixed in the recorded target class,
+        as ReplayTarget for Local transcripts :
+            class ReplaySSH(Replay, SSH): pass
+        repeated commands get their results in recorded order,
+        the last one is kept for further calls
+        latency : None or recorded durations factor
+    '''
+    def __init__(self, transcript, latency=None, **kw):
+        self.transcript = load(transcript)
+        self.latency = latency
+        self.replay_lock = Lock()
+        super().__init__(**kw)
+
+    def do_run(self, *arg, **kw):
+        cmd = command(arg)
+        with self.replay_lock:
+            results = self.transcript.get(cmd)
+            if not results:
+                error(f'replay ! {cmd} not recorded')
+                return 127, [], [f'{cmd} not recorded']
+            entry = results.popleft() if len(results) > 1 else results[0]
+        if self.latency:
+            sleep(entry['duration'] * self.latency)
+        return entry['ret'], entry['out'], entry['err']
+
+
+class ReplayTarget(Replay, CoreTarget):
+    def __init__(self, transcript, latency=None, **kw):
+        kw['name'] = kw.get('name', 'replay')
+        super().__init__(transcript, latency, **kw)
+
+    def run(self, *arg, **kw):
+        ''' same command rewriting as Local.run
+        '''
+        kw.pop('term', None)
+        arg, kw = self.parse(*arg, **kw)
+        if sudo := kw.pop('sudo', None):
+            arg = self.sudo_args(arg, sudo)
+        return super().run(*arg, **kw)
+
+    def set_local(self):
+        self.local = self
+        return self.local
@@ -1,4 +1,5 @@
-from time import sleep
+from threading import Event, RLock
+from time import monotonic
 
 from pybrary.func import todo
 
@@ -6,6 +7,8 @@ from setux.logger  import info, error
 from setux.actions.service import Enabler, Disabler, Starter, Stoper, Restarter
 
 from .manage import Manager
+from .readiness import poll
+from .parallel import levels, pmap
 
 
 # pylint: disable=assignment-from-no-return
@@ -15,33 +18,135 @@ class Service(Manager):
     def __init__(self, distro):
         super().__init__(distro)
         self.svcmap = distro.svcmap
+        self.probes = dict()
+        self.deadline = 30
+        self.snap = dict()
+        self.snap_time = 0
+        self.snap_ttl = 5
+        self.generation = 0
+        self.inflight = []
+        self.lock = RLock()
+
+    def snapshot(self, names=None):
+        ''' fetch (active, enabled) for names (all units if None)
+            kept snap_ttl seconds for status / enabled
+        '''
+        svcs = [self.svcmap.get(name, name) for name in names] if names else None
+        pending = set(svcs) if svcs else None, Event()
+        with self.lock:
+            generation = self.generation
+            self.inflight.append(pending)
+        try:
+            states = self.shared('snapshot', tuple(svcs or ()),
+                lambda: dict(self.do_snapshot(svcs))
+            )
+        finally:
+            with self.lock:
+                self.inflight.remove(pending)
+            pending[1].set()
+        with self.lock:
+            # not kept if invalidated meanwhile
+            if generation == self.generation:
+                if names and self.snap_time + self.snap_ttl > monotonic():
+                    self.snap.update(states)
+                else:
+                    self.snap = dict(states)
+                    self.snap_time = monotonic()
+        if not names: return states
+        return {
+            name : states.get(svc, (None, None))
+            for name, svc in zip(names, svcs)
+        }
+
+    def snapped(self, svc):
+        ''' snapshot state of svc, once in-flight snapshots covering it are done
+        '''
+        with self.lock:
+            pending = list(self.inflight)
+        for covered, done in pending:
+            if covered is None or svc in covered:
+                done.wait()
+        with self.lock:
+            if self.snap_time + self.snap_ttl > monotonic():
+                return self.snap.get(svc)
+
+    @property
+    def bulk(self):
+        ''' True if do_snapshot is overridden by a single command
+        '''
+        return type(self).do_snapshot is not Service.do_snapshot
+
+    @property
+    def listable(self):
+        ''' True if all units can be snapshot
+        '''
+        return self.bulk or type(self).do_units is not Service.do_units
+
+    def shared(self, kind, svc, func, *a):
+        ''' func(*a), shared by concurrent identical queries
+        '''
+        with self.lock:
+            key = kind, self.manager, svc, self.generation
+        return self.target.flight.do(key, func, *a)
+
+    def invalidate(self, name=None):
+        with self.lock:
+            self.generation += 1
+            if name:
+                svc = self.svcmap.get(name, name)
+                self.snap.pop(svc, None)
+            else:
+                self.snap = dict()
 
     def status(self, name):
         svc = self.svcmap.get(name, name)
-        up = self.do_status(svc)
+        state = self.snapped(svc)
+        up = state[0] if state else self.shared('status', svc, self.do_status, svc)
         info(f'\tservice {name} {"." if up else "X"}')
         return up
 
-    def wait(self, name, up=True):
-        sleep(1)
-        for _ in range(3):
-            if self.status(name) is up: break
-            sleep(3)
+    def enabled(self, name):
+        svc = self.svcmap.get(name, name)
+        state = self.snapped(svc)
+        return state[1] if state else self.shared('enabled', svc, self.do_enabled, svc)
+
+    def probe(self, name, probe):
+        ''' probe : callable(target) -> bool
+            checked after the service is active
+        '''
+        self.probes[name] = probe
+
+    def ready(self, name, up=True):
+        svc = self.svcmap.get(name, name)
+        if bool(self.do_status(svc)) is not up: return False
+        if not up: return True
+        probe = self.probes.get(name) or self.probes.get(svc)
+        return probe(self.target) if probe else True
+
+    def wait(self, name, up=True, deadline=None):
+        ok = poll(
+            lambda: self.ready(name, up),
+            deadline or self.deadline,
+        )
+        info(f'\tservice {name} {"." if ok is up else "X"}')
+        return ok
 
     def enable_svc(self, name):
         svc = self.svcmap.get(name, name)
-        if not self.do_enabled(svc):
+        if not self.enabled(name):
             info(f'\tenable {name}')
             self.do_enable(svc)
-            enabled = self.do_enabled(svc)
+            self.invalidate(name)
+            enabled = self.enabled(name)
             info(f'\t{name} enabled {"." if enabled else "X"}')
 
     def disable_svc(self, name):
         svc = self.svcmap.get(name, name)
-        if self.do_enabled(svc):
+        if self.enabled(name):
             info(f'\tdisable {name}')
             self.do_disable(svc)
-            enabled = self.do_enabled(svc)
+            self.invalidate(name)
+            enabled = self.enabled(name)
             info(f'\t{name} disabled {"." if not enabled else "X"}')
 
     def start_svc(self, name):
@@ -49,6 +154,7 @@ class Service(Manager):
         if not self.status(name):
             info(f'\tstart {name}')
             self.do_start(svc)
+            self.invalidate(name)
             self.wait(name)
 
     def stop_svc(self, name):
@@ -56,6 +162,7 @@ class Service(Manager):
         if self.status(name):
             info(f'\tstop {name}')
             self.do_stop(svc)
+            self.invalidate(name)
             self.wait(name, up=False)
 
     def restart_svc(self, name):
@@ -63,6 +170,7 @@ class Service(Manager):
         if self.status(name):
             info(f'\trestart {name}')
             self.do_restart(svc)
+            self.invalidate(name)
             self.wait(name)
         else:
             self.start(name)
@@ -112,6 +220,52 @@ class Service(Manager):
             return False
         return True
 
+    def batch(self, Action, names, after=None, reverse=False, verbose=True, workers=None):
+        ''' run Action on names concurrently
+            after : {name : names it must follow}
+        '''
+        result = dict()
+        steps = list(levels(names, after))
+        if reverse: steps.reverse()
+        for step in steps:
+            if self.bulk:
+                # priming per unit would cost more than the checks
+                try:
+                    self.snapshot(step)
+                except Exception as x:
+                    error(f'snapshot ! {x}')
+            actions = [
+                Action(self.target, servicer=self, name=self.svcmap.get(name, name))
+                for name in step
+            ]
+            marks = pmap(lambda action: action.converge(), actions, workers)
+            for name, action, mark in zip(step, actions, marks):
+                result[name] = action.report(mark, verbose)
+        return result
+
+    def enable_many(self, names, after=None, verbose=True):
+        return self.batch(Enabler, names, after, verbose=verbose)
+
+    def disable_many(self, names, after=None, verbose=True):
+        return self.batch(Disabler, names, after, reverse=True, verbose=verbose)
+
+    def start_many(self, names, after=None, verbose=True):
+        return self.batch(Starter, names, after, verbose=verbose)
+
+    def stop_many(self, names, after=None, verbose=True):
+        return self.batch(Stoper, names, after, reverse=True, verbose=verbose)
+
+    def restart_many(self, names, after=None, verbose=True):
+        return self.batch(Restarter, names, after, verbose=verbose)
+
+    def do_snapshot(self, svcs):
+        ''' yield svc, (active, enabled)
+            to be overridden by a single command
+        '''
+        for svc in svcs or self.do_units():
+            yield svc, (self.do_status(svc), self.do_enabled(svc))
+
+    def do_units(self): todo(self)
     def do_enabled(self, svc): todo(self)
     def do_status(self, svc): todo(self)
     def do_enable(self, svc): todo(self)
@@ -5,6 +5,20 @@ from subprocess import (
     run,
 )
 from functools import partial
+from threading import Lock, Thread
+from contextlib import contextmanager
+from contextvars import ContextVar
+from base64 import b64decode
+from hashlib import sha256
+from importlib import import_module
+from json import dumps
+from mmap import mmap, ACCESS_READ
+from os import replace, unlink
+from os.path import basename, dirname, join
+from pathlib import Path
+from shutil import copy, copytree, ignore_patterns, which
+from tempfile import TemporaryDirectory
+from time import perf_counter
 
 from pybrary.func import todo
 
@@ -15,9 +29,24 @@ from .errors import (
     ModuleTypeError,
     UnsupportedDistroError,
     ExecError,
+    TransferError,
+    OutputLimitError,
 )
 from .distro import Distro
-from .module import Module
+from .module import Module, module_name
+from .action import Context
+from .package import CommonPackager
+from .service import Service
+from .journal import Journal, stable
+from .profile import Profiler, profiled
+from .remote import events
+from .events import EventLog
+from .parallel import pmap, SingleFlight
+from .facts import Facts
+from .transcript import Recorder
+from .output import Output, capture
+from .helper import Helper, boot
+from . import deadline
 from . import plugins
 import setux.distros
 
@@ -25,16 +54,51 @@ import setux.distros
 # pylint: disable= filter-builtin-not-iterating
 
 
+def blocks(source, size):
+    ''' source (file object or iterable of bytes)
+        as blocks of at most size bytes
+    '''
+    if hasattr(source, 'read'):
+        while block := source.read(size):
+            yield block
+        return
+    buf = bytearray()
+    for data in source:
+        buf += data
+        while len(buf) >= size:
+            yield bytes(buf[:size])
+            del buf[:size]
+    if buf:
+        yield bytes(buf)
+
+
 class CoreTarget:
+    journal = None
+    profiler = None
+    deployed = None
+    exports = ['pybrary']
+    events = None
+    recorder = None
+    chunk = 4 << 20
+    output_limit = None
+    helpers = None
+
     def __init__(self, *,
         name = None,
         distro = None,
         outdir = None,
         exclude = None,
+        prefetch = False,
     ):
         self.name = name or 'target'
+        self.contexts = ContextVar(f'{self.name} context')
+        self.context = dict()
         self.outdir = outdir
         self.release_infos = None
+        self.facts = Facts(self)
+        self.flight = SingleFlight()
+        self.tool_lock = Lock()
+        self.budgets = []
 
         self.cnx = self.chk_cnx()
         if self.cnx:
@@ -43,9 +107,24 @@ class CoreTarget:
             )
             self.probe_distro()
             self.exclude = exclude
+            if prefetch:
+                self.prefetch()
         else:
             self.distro = None
 
+    @property
+    def context(self):
+        ''' actions context
+            swapped by actions, apart in each thread / parallel branch
+        '''
+        return self.contexts.get(self._context_)
+
+    @context.setter
+    def context(self, context):
+        if not isinstance(context, Context):
+            self._context_ = context
+        self.contexts.set(context)
+
     @property
     def outdir(self):
         return getattr(self, '_outdir_', None)
@@ -68,11 +147,152 @@ class CoreTarget:
         for Dist in Distros:
             if Dist.release_check(self, infos):
                 self.distro = Dist(self)
-                debug(f'{self.distro.system.hostname} : {self.distro.name}')
+                debug(lambda: f'{self.facts.hostname} : {self.distro.name}')
                 break
         else:
             raise UnsupportedDistroError(self)
 
+    def prefetch(self):
+        ''' warm up packages and services state in the background
+            checks asking for it meanwhile share the same query
+        '''
+        distro = self.distro
+        tasks = [('installed', lambda: list(distro.Package.installed()))]
+        for name, manager in distro.managers.items():
+            # only packagers whose installable reads the cache
+            if isinstance(manager, CommonPackager) and (
+                type(manager).do_installable is CommonPackager.do_installable
+            ):
+                tasks.append((f'{name} cache', manager.fresh_cache))
+        if isinstance(distro.Service, Service) and distro.Service.listable:
+            tasks.append(('services', distro.Service.snapshot))
+
+        def warm(name, task):
+            try:
+                task()
+                debug(f'prefetch {name} .')
+            except Exception as x:
+                debug(f'prefetch {name} ! {x}')
+
+        threads = [
+            Thread(target=warm, args=task, name=f'prefetch {task[0]}', daemon=True)
+            for task in tasks
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def set_journal(self, path=None, fresh=3600):
+        ''' skip actions converged less than fresh seconds ago
+            with an unchanged fingerprint
+        '''
+        path = path or f'/tmp/setux/journal/{self.name}.json'
+        self.journal = Journal(path, fresh)
+        debug(f'journal : {path}')
+        return self.journal
+
+    def set_events(self, path=None):
+        ''' structured JSONL events : actions, checks, commands, deploys
+        '''
+        if self.events is not None:
+            self.events.close()
+        if path is None:
+            root = self.outdir or '/tmp/setux/events'
+            path = f'{root}/{self.name}.jsonl'
+        self.events = EventLog(path, self.name)
+        debug(f'events : {path}')
+        return self.events
+
+    def set_helper(self, user='root'):
+        ''' run the sudo={user} commands of managers and scripts
+            through a persistent helper
+        '''
+        helper = Helper.start(self, user)
+        if helper:
+            if self.helpers is None:
+                self.helpers = dict()
+            old = self.helpers.pop(user, None)
+            if old: old.close()
+            self.helpers[user] = helper
+        return helper
+
+    def helper_cmd(self, user):
+        ''' command starting the helper as user
+            to be overridden by remote targets
+        '''
+        return ['sudo', '-n', f'--user={user}'] + boot
+
+    def sudo_args(self, args, user):
+        ''' args as run(*args, sudo=user) passes them to do_run
+            to be overridden by remote targets
+        '''
+        try:
+            if user != self.distro.login.name:
+                return ['sudo', f'--user={user}'] + list(args)
+        except Exception: pass
+        return list(args)
+
+    def run_as(self, *arg, sudo=None, **kw):
+        helper = self.helpers and self.helpers.get(sudo)
+        if helper:
+            return helper.run(*arg, **kw)
+        return self.run(*arg, sudo=sudo, **kw)
+
+    @contextmanager
+    def budget(self, seconds):
+        ''' deadline for the block : deploys, actions and commands
+            commands get the remaining time as timeout
+        '''
+        with deadline.budget(seconds) as bud:
+            self.budgets.append(bud)
+            try:
+                yield bud
+            finally:
+                self.budgets.remove(bud)
+
+    def cancel(self):
+        ''' cancel the active budgets, from any thread
+            every branch stops at its next check
+        '''
+        for bud in list(self.budgets):
+            bud.cancel()
+
+    def set_recorder(self, path=None):
+        ''' record every command in a replayable transcript
+            see replay.Replay
+        '''
+        if self.recorder is not None:
+            self.recorder.close()
+        if path is None:
+            root = self.outdir or '/tmp/setux/transcripts'
+            path = f'{root}/{self.name}.jsonl.gz'
+        self.recorder = Recorder(path)
+        debug(f'recorder : {path}')
+        return self.recorder
+
+    @contextmanager
+    def profile(self, name=None):
+        ''' time actions, modules and commands
+            profiler.save(path) : collapsed stacks or .json
+        '''
+        self.profiler = Profiler(name or self.name)
+        try:
+            yield self.profiler
+        finally:
+            self.profiler.stop()
+            self.profiler = None
+
+    @contextmanager
+    def deploy_once(self):
+        ''' identical deploy(module, **kw) calls run only once
+        '''
+        back = self.deployed
+        self.deployed = dict() if back is None else back
+        try:
+            yield self.deployed
+        finally:
+            self.deployed = back
+
     def set_trace(self):
         self.outrun = f'{self.outdir}/{self.name}.run'
         self.outlog = f'{self.outdir}/{self.name}.log'
@@ -92,6 +312,9 @@ class CoreTarget:
 
             with open(self.outlog, 'a') as log:
                 log.write(f'\n[{ret:^3}] {cmd}\n')
+                if isinstance(out, Output) and out.truncated:
+                    full = f'in {out.path}' if out.path else 'truncated'
+                    log.write(f'[out] {out.size} bytes, {full}\n')
                 if out:
                     if kw.get('report')=='quiet':
                         if len(out)==1:
@@ -129,26 +352,74 @@ class CoreTarget:
         args.extend(arg)
         return args, kw
 
-    def run(self, *arg, report='normal', critical=True, raw=False, skip=None, timeout=None, signal='INT', **kw):
+    def run(self, *arg, shared=False, **kw):
+        ''' shared : read-only command, concurrent
+                     identical calls share one execution
+        '''
+        if shared:
+            key = arg, repr(sorted(kw.items()))
+            return self.flight.do(key, CoreTarget.run, self, *arg, **kw)
+        return self.observed(arg, kw, lambda: self.do_run(*arg, **kw))
+
+    def observed(self, arg, kw, call):
+        ''' call() running the command arg, profiled,
+            recorded and emitted as event
+            shared by run and the helpers
+        '''
+        with profiled(self, lambda: f'run {" ".join(str(a) for a in arg)}'):
+            if self.events is None and self.recorder is None:
+                return call()
+            start = perf_counter()
+            ret, out, err = call()
+            duration = perf_counter() - start
+            if self.recorder is not None:
+                self.recorder.record(arg, kw, ret, out, err, duration)
+            if self.events is not None:
+                self.events.emit('command',
+                    command = ' '.join(str(a) for a in arg),
+                    ret = ret,
+                    duration = duration,
+                )
+            return ret, out, err
+
+    def spawn(self, cmd, limit, spill, kw):
+        if limit:
+            return capture(cmd, limit, spill, **kw)
+        return run(cmd, stdout=PIPE, stderr=PIPE, **kw)
+
+    def do_run(self, *arg, report='normal', critical=True, raw=False, skip=None, timeout=None, signal='INT', limit=None, spill=False, **kw):
+        ''' limit : output budget (bytes), past it only head and tail are kept
+                    out is then an Output, with the full output in out.path if spill
+                    0 / False : no limit, even if output_limit is set
+        '''
         def log(*msg):
             if report=='verbose':
                 debug(*msg)
 
-        if timeout:
-            arg = ('timeout', '--signal', f'SIG{signal.upper()}', f'{timeout}s') + arg
+        limit = limit if limit is not None else self.output_limit
 
         cmd = arg
         command = ' '.join(cmd)
         if kw.get('shell'):
             cmd = command
+        prefix = deadline.bounded(command, timeout, signal)
+
+        def spawn(shell):
+            if prefix and not shell and not which(cmd[0]):
+                # timeout would fail where spawning raises OSError
+                shell = True
+            bounded, kw['shell'] = deadline.wrap(prefix, cmd, shell)
+            return self.spawn(bounded, limit, spill, kw)
 
         try:
             log('running "%s" ...', command)
             try:
-                proc = run(cmd, stdout=PIPE, stderr=PIPE, **kw)
+                proc = spawn(kw.get('shell'))
             except OSError:
-                kw['shell'] = True
-                proc = run(cmd, stdout=PIPE, stderr=PIPE, **kw)
+                proc = spawn(True)
+            if limit and raw and proc.size > proc.kept:
+                if proc.path: unlink(proc.path)
+                raise OutputLimitError(command, proc.size, limit)
 
             out = proc.stdout.decode('utf-8', errors='replace').strip()
             if out:
@@ -158,6 +429,8 @@ class CoreTarget:
                     out = [i.strip() for i in out.split('\n')]
                     if skip:
                         out = [i for i in out if not skip(i)]
+                    if limit:
+                        out = Output(out, proc.size, proc.kept, proc.path)
 
             err = proc.stderr.decode('utf-8', errors='replace').strip()
             if err:
@@ -229,7 +502,20 @@ class CoreTarget:
             raise ModuleTypeError(cls)
 
         report = kw.pop('report', 'normal') != 'quiet'
-        ret = cls(self.distro).deploy(self, **kw)
+        if self.deployed is not None:
+            key = cls, stable(kw)
+            if key in self.deployed:
+                debug(f'{module} already deployed')
+                return self.deployed[key]
+        deadline.check(module_name(cls))
+        with profiled(self, lambda: f'module {module_name(cls)}'):
+            if self.events is None:
+                ret = self.distro.module(cls).deploy(self, **kw)
+            else:
+                with self.events.span('deploy', module=str(module), params=kw) as result:
+                    ret = result['ok'] = self.distro.module(cls).deploy(self, **kw)
+        if self.deployed is not None:
+            self.deployed[key] = ret
         if report:
             name = kw.pop('name', None)
             params = ', '.join(f'{k}={v}' for k, v in kw.items()) if kw else ''
@@ -246,61 +532,426 @@ class CoreTarget:
             error(f'\n ! Module register Error !\n{self} has already a "{name}" attribute.\n')
             return
         setattr(self, name, partial(self.deploy, module, name=name))
-        debug(f'{module.__module__} registred as {name}')
+        debug(lambda: f'{module.__module__} registred as {name}')
 
     def rsync_check(self):
         if hasattr(self, '_rsync_checked_'): return
-        ret, out, err =  self.run('rsync --version', report='quiet')
-        if ret:
-            self.Package.install('rsync')
-        self._rsync_checked_ = True
+        with self.tool_lock:
+            if hasattr(self, '_rsync_checked_'): return
+            if not self.facts.rsync:
+                self.Package.install('rsync')
+                self.facts.invalidate('rsync')
+            self._rsync_checked_ = True
 
     def rsync_opt(self):
         ''' additional rsync opts
         '''
 
-    def rsync(self, *arg, **kw):
-        self.rsync_check()
-        arg, kw = self.parse(*arg, **kw)
-        cmd = 'rsync -qlpogcr -zz --delete'.split()
+    def rsync_cmd(self, flags='-qlpogcr'):
+        cmd = ['rsync', flags, '-zz', '--delete']
         if self.exclude:
             cmd.extend(['--exclude-from', self.exclude, '--delete-excluded'])
         opt = self.rsync_opt()
         if opt:
             cmd.append(opt)
+        return cmd
+
+    def rsync(self, *arg, **kw):
+        self.rsync_check()
+        arg, kw = self.parse(*arg, **kw)
+        cmd = self.rsync_cmd()
         cmd.extend(arg)
         kw['report'] = 'verbose'
         ret, out, err =  CoreTarget.run(self, *cmd, **kw)
         self.trace('rsync '+' '.join(arg), ret, out, err, **kw)
         return ret==0
 
-    def script(self, content, cmd=None, sudo=None, path=None, name=None, trim=True, remove=True, report='quiet'):
+    def rsync_many(self, pairs, workers=4):
+        ''' sync many (src, dst) trees
+            pairs sharing the same parents and name are merged
+            into a single relative rsync, run concurrently
+            return {(src, dst) : {created, updated, deleted}}
+            stats are None on failure
+        '''
+        self.rsync_check()
+        groups = dict()
+        for src, dst in pairs:
+            src, dst = src.rstrip('/'), dst.rstrip('/')
+            name = basename(src)
+            if name and name == basename(dst) and dirname(src) and dirname(dst):
+                key = dirname(src), dirname(dst)
+            else:
+                key = src, dst
+                name = None
+            groups.setdefault(key, dict())[name] = src, dst
+
+        def sync(item):
+            (src, dst), names = item
+            cmd = self.rsync_cmd('-ilpogcr')
+            if None in names:
+                cmd.extend([f'{src}/', dst])
+            else:
+                cmd.append('-R')
+                cmd.extend(f'{src}/./{name}/' for name in names)
+                cmd.append(f'{dst}/')
+            ret, out, err = CoreTarget.run(self, *cmd, report='quiet', limit=0)
+            self.trace(' '.join(cmd), ret, out, err)
+            if ret: return dict.fromkeys(names)
+            stats = {
+                name : dict(created=0, updated=0, deleted=0)
+                for name in names
+            }
+            for line in out:
+                flags, _, path = line.partition(' ')
+                if None in names:
+                    name = None
+                else:
+                    name = path.strip().split('/')[0]
+                    if name not in stats: continue
+                if flags == '*deleting':
+                    stats[name]['deleted'] += 1
+                elif '+++++' in flags:
+                    stats[name]['created'] += 1
+                else:
+                    stats[name]['updated'] += 1
+            return stats
+
+        items = list(groups.items())
+        result = dict()
+        for (key, names), stats in zip(items, pmap(sync, items, workers)):
+            for name, pair in names.items():
+                result[pair] = stats[name]
+        return {
+            (src, dst) : result[src.rstrip('/'), dst.rstrip('/')]
+            for src, dst in pairs
+        }
+
+    def script(self, content, cmd=None, sudo=None, path=None, name=None, trim=True, remove=True, report='quiet', limit=None):
         path = path or '/tmp/setux'
         self.run(f'mkdir -p {path}')
-        self.run(f'chmod 777 {path}', sudo='root')
+        self.run_as(f'chmod 777 {path}', sudo='root')
         name = name or 'script'
         full = '/'.join((path, name))
         if trim:
             lines = (line.strip() for line in content.split('\n'))
             content = '\n'.join(line for line in lines if line)+'\n'
-        self.write(full, content, report='quiet')
+        if remove:
+            self.write(full, content, report='quiet')
+        else:
+            self.write_changed(full, content, report='quiet')
         if cmd:
-            if sudo:
-                cmd = f'sudo -u {sudo} {cmd}'
-            self.run(f'chmod 644 {full}', sudo=sudo)
-            ret, out, err = self.run(cmd.format(full))
+            self.run_as(f'chmod 644 {full}', sudo=sudo)
+            ret, out, err = self.run_as(cmd.format(full), sudo=sudo, limit=limit)
         else:
-            self.run(f'chmod +x {full}', sudo=sudo)
-            ret, out, err = self.run(full, sudo=sudo)
+            self.run_as(f'chmod +x {full}', sudo=sudo)
+            ret, out, err = self.run_as(full, sudo=sudo, limit=limit)
         if remove:
-            self.run(f'rm {full}', report='quiet', sudo=sudo)
+            self.run_as(f'rm {full}', report='quiet', sudo=sudo)
         return ret, out, err
 
     def read(self, path, mode='rt', report='normal'): todo(self)
     def write(self, path, content, mode='wt', report='normal'): todo(self)
     def send(self, local, remote): todo(self)
+    def do_send(self, local, remote): todo(self)
+    def do_send_as(self, sudo, local, remote): todo(self)
     def fetch(self, remote, local): todo(self)
     def sync(self, src, dst=None): todo(self)
-    def export(self, path): todo(self)
-    def remote(self, module, export_path=None, **kw): todo(self)
+
+    def hashes(self, paths, sudo=None):
+        ''' {path : sha256 of the target file, None if missing}
+            in a single command
+        '''
+        found = dict.fromkeys(paths)
+        if not found: return found
+        ret, out, err = self.run(
+            f'sha256sum {" ".join(quote(path) for path in found)}',
+            shell = True,
+            report = 'quiet',
+            critical = False,
+            shared = True,
+            limit = 0,
+            sudo = sudo,
+        )
+        for line in out:
+            digest, _, path = line.partition(' ')
+            path = path.strip().lstrip('*')
+            if path in found:
+                found[path] = digest.lstrip('\\')
+        return found
+
+    def send_many(self, files, sudo=None, report='normal'):
+        ''' files : {local : remote}
+            send only the files whose content differs,
+            through a temporary sibling renamed over the target
+            return {remote : changed}, changed is None on failure
+        '''
+        remote = self.hashes(list(files.values()), sudo)
+        local = {
+            dst : sha256(Path(src).read_bytes()).hexdigest()
+            for src, dst in files.items()
+        }
+        changed = [
+            (src, dst)
+            for src, dst in files.items()
+            if local[dst] != remote[dst]
+        ]
+        result = dict.fromkeys(remote, False)
+        if changed:
+            dirs = ' '.join(sorted({dirname(dst) or '.' for src, dst in changed}))
+            self.run(f'mkdir -p {dirs}', report='quiet', sudo=sudo)
+        for src, dst in changed:
+            if report=='normal':
+                info(f'\tsend {src} -> {dst}')
+            ok = self.do_replace(src, dst, remote[dst] is not None, sudo)
+            result[dst] = True if ok else None
+        debug(lambda: f'send {len(changed)} changed, {len(files)-len(changed)} unchanged')
+        return result
+
+    def write_many(self, contents, sudo=None, report='normal'):
+        ''' contents : {path : content (str or bytes)}
+            write only the files whose content differs
+            return {path : changed}, changed is None on failure
+        '''
+        with TemporaryDirectory() as tmp:
+            files = dict()
+            for index, (path, content) in enumerate(contents.items()):
+                local = join(tmp, str(index))
+                data = content.encode() if isinstance(content, str) else content
+                Path(local).write_bytes(data)
+                files[local] = str(path)
+            result = self.send_many(files, sudo, report='quiet')
+        if report=='normal':
+            for path, changed in result.items():
+                if changed: info(f'\twrite {path}')
+        return result
+
+    def write_changed(self, path, content, sudo=None, report='normal'):
+        ''' write path if its content differs
+            return True if written, False if unchanged, None on failure
+        '''
+        return self.write_many({path : content}, sudo, report)[str(path)]
+
+    def send_changed(self, src, dst=None, sudo=None, report='normal'):
+        ''' send src if dst content differs
+            return True if sent, False if unchanged, None on failure
+        '''
+        dst = dst or src
+        return self.send_many({src : dst}, sudo, report)[dst]
+
+    def do_replace(self, local, path, exists, sudo=None):
+        ''' send local next to path, then rename it over path
+        '''
+        tmp = join(dirname(path), f'.{basename(path)}.setux')
+        if sudo:
+            ok = self.do_send_as(sudo, local, tmp)
+        else:
+            ok = self.do_send(local, tmp)
+        if not ok: return False
+        tmp, path = quote(tmp), quote(path)
+        if exists:
+            # keep the owner and mode of the replaced file
+            for attr in ('chown', 'chmod'):
+                self.run(f'{attr} --reference={path} {tmp}', shell=True, report='quiet', critical=False, sudo=sudo)
+        ret, out, err = self.run(f'mv -f {tmp} {path}', shell=True, report='quiet', sudo=sudo)
+        return ret == 0
+
+    def file_size(self, path, sudo=None):
+        ''' size of the target file, None if missing
+        '''
+        ret, out, err = self.run(f'stat -c %s {path}', report='quiet', critical=False, shared=True, sudo=sudo)
+        try:
+            return int(out[0]) if ret==0 else None
+        except (IndexError, ValueError):
+            return None
+
+    def read_chunks(self, path, offset=0, sudo=None):
+        ''' yield the content of path from offset,
+            at most chunk bytes at a time
+        '''
+        size = self.file_size(path, sudo)
+        if size is None:
+            raise TransferError(path, 'not found')
+        while offset < size:
+            ret, out, err = self.run(
+                f'tail -c +{offset+1} {path} | head -c {self.chunk} | base64 -w0',
+                report = 'quiet',
+                raw = True,
+                limit = 0,
+                term = False,
+                sudo = sudo,
+            )
+            block = b64decode(out) if ret==0 and out else None
+            if not block:
+                raise TransferError(path, f'read at {offset} : {err}')
+            offset += len(block)
+            yield block
+
+    def append_chunks(self, path, blocks, sudo=None):
+        ''' append each block to the target file
+        '''
+        for block in blocks:
+            ret, out, err = self.run(
+                f'dd of={path} oflag=append conv=notrunc status=none',
+                input = block,
+                report = 'quiet',
+                term = False,
+                sudo = sudo,
+            )
+            if ret:
+                raise TransferError(path, err)
+
+    def commit_part(self, part, path, size, sudo=None):
+        if self.file_size(part, sudo) != size:
+            raise TransferError(path, 'size mismatch')
+        ret, out, err = self.run(f'mv -f {part} {path}', report='quiet', sudo=sudo)
+        return ret == 0
+
+    def write_chunks(self, path, source, sudo=None):
+        ''' write source (file object or iterable of bytes) to path
+            without holding it in memory
+        '''
+        part = f'{path}.part'
+        self.run(f'mkdir -p {dirname(path) or "."}', report='quiet', sudo=sudo)
+        self.run(f'rm -f {part}', report='quiet', sudo=sudo)
+        size = 0
+        def counted():
+            nonlocal size
+            for block in blocks(source, self.chunk):
+                size += len(block)
+                yield block
+        self.append_chunks(part, counted(), sudo)
+        if not size:
+            self.run(f'touch {part}', report='quiet', sudo=sudo)
+        return self.commit_part(part, path, size, sudo)
+
+    def send_chunked(self, local, remote=None, resume=True, sudo=None):
+        ''' send a large file chunk by chunk
+            an interrupted transfer is resumed from remote.part
+        '''
+        remote = remote or local
+        part = f'{remote}.part'
+        size = Path(local).stat().st_size
+        done = self.file_size(part, sudo) if resume else None
+        if done is None or done > size:
+            self.run(f'mkdir -p {dirname(remote) or "."}', report='quiet', sudo=sudo)
+            self.run(f'rm -f {part}', report='quiet', sudo=sudo)
+            self.run(f'touch {part}', report='quiet', sudo=sudo)
+            done = 0
+        elif done:
+            debug(f'send {remote} resumed at {done}')
+        if size:
+            with open(local, 'rb') as src, mmap(src.fileno(), 0, access=ACCESS_READ) as data:
+                self.append_chunks(part, (
+                    data[offset : offset+self.chunk]
+                    for offset in range(done, size, self.chunk)
+                ), sudo)
+        return self.commit_part(part, remote, size, sudo)
+
+    def fetch_chunked(self, remote, local=None, resume=True, sudo=None):
+        ''' fetch a large file chunk by chunk
+            an interrupted transfer is resumed from local.part
+        '''
+        local = local or remote
+        part = Path(f'{local}.part')
+        size = self.file_size(remote, sudo)
+        if size is None:
+            raise TransferError(remote, 'not found')
+        done = part.stat().st_size if resume and part.exists() else 0
+        if done > size: done = 0
+        part.parent.mkdir(parents=True, exist_ok=True)
+        with open(part, 'ab' if done else 'wb') as dst:
+            for block in self.read_chunks(remote, done, sudo):
+                dst.write(block)
+        if part.stat().st_size != size:
+            raise TransferError(remote, 'size mismatch')
+        replace(part, local)
+        return True
+
+    def stage(self, root, modules=None):
+        ''' copy setux, limited to modules and their deps, and exports in root
+        '''
+        import setux
+
+        skip = ignore_patterns('__pycache__', '*.pyc')
+        for portion in setux.__path__:
+            for pkg in Path(portion).iterdir():
+                if not pkg.is_dir() or not any(pkg.rglob('*.py')): continue
+                if not (modules and pkg.name=='modules'):
+                    copytree(pkg, join(root, 'setux', pkg.name), ignore=skip, dirs_exist_ok=True)
+        for name in self.exports:
+            pkg = import_module(name)
+            copytree(dirname(pkg.__file__), join(root, name), ignore=skip, dirs_exist_ok=True)
+
+        if modules:
+            graph = self.distro.modules.graph
+            required = set(modules)
+            for name in modules:
+                required.update(graph.transitive(name))
+            for name in required:
+                cls = self.distro.modules.items[name]
+                src = import_module(cls.__module__).__file__
+                dst = Path(root, 'setux', 'modules', *name.split('.')).with_suffix('.py')
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                copy(src, dst)
+
+    def export(self, path, modules=None):
+        ''' ship setux and the required modules to path
+        '''
+        with TemporaryDirectory() as root:
+            self.stage(root, modules)
+            return self.sync(root, path)
+
+    def remote_path(self):
+        ''' private export dir (mode 700), made once per target
+            a shared one would let any user inject modules
+        '''
+        path = getattr(self, '_remote_path_', None)
+        if path is None:
+            ret, out, err = self.run('mktemp -d /tmp/setux-remote.XXXXXXXX', report='quiet')
+            if ret or not out:
+                raise TransferError('/tmp/setux-remote', f'mktemp ! {err}')
+            path = self._remote_path_ = out[0]
+        return path
+
+    def remote(self, module, export_path=None, **kw):
+        ''' deploy module in a single python process on the target
+            return ok, events (log records and result)
+        '''
+        if isinstance(module, str):
+            name = module
+        else:
+            name = next((
+                key
+                for key, cls in self.distro.modules.items.items()
+                if cls is module
+            ), None)
+            if name is None:
+                raise MissingModuleError(module.__name__, self.distro)
+        info(f'\tremote {name}')
+        path = export_path or self.remote_path()
+        self.export(path, [name])
+        invocation = f'{path}/invocation.json'
+        self.write(invocation, dumps(dict(name=self.name, module=name, kwargs=kw)), report='quiet')
+        ret, out, err = self.run(
+            f'env PYTHONPATH={path} python3 -m setux.core.remote {invocation}',
+            report = 'quiet',
+            limit = 0,
+        )
+        self.run(f'rm -f {invocation}', report='quiet')
+        found = list(events(out or []))
+        for evt in found:
+            if evt['event']=='log':
+                if evt['level'] in ('ERROR', 'CRITICAL'):
+                    error(evt['msg'])
+                elif evt['level']=='INFO':
+                    info(evt['msg'])
+                else:
+                    debug(evt['msg'])
+            elif evt['event']=='error':
+                error(f'remote {name} ! {evt["msg"]}')
+        result = [evt for evt in found if evt['event']=='result']
+        ok = ret==0 and bool(result) and result[-1]['ok']
+        if err and not ok:
+            error('\n'.join(err))
+        return ok, found
 
@@ -0,0 +1,64 @@
+from collections import defaultdict, deque
+from gzip import open as gzopen
+from json import dumps, loads
+from os import makedirs
+from os.path import dirname
+from threading import Lock
+
+
+def opener(path, mode):
+    if path.endswith('.gz'):
+        return gzopen(path, mode+'t')
+    return open(path, mode)
+
+
+def command(arg):
+    return ' '.join(str(a) for a in arg)
+
+
+class Recorder:
+    ''' Commands transcript
+
+        one JSON line per command :
+        cmd, kw, ret, out, err, duration
+        gzipped if path ends with .gz
+    '''
+    def __init__(self, path):
+        self.path = path
+        makedirs(dirname(path) or '.', exist_ok=True)
+        self.file = opener(path, 'w')
+        self.lock = Lock()
+
+    def record(self, arg, kw, ret, out, err, duration):
+        line = dumps(dict(
+            cmd = command(arg),
+            kw = {
+                k : v
+                for k, v in kw.items()
+                if isinstance(v, (str, int, float, bool, type(None)))
+            },
+            ret = ret,
+            out = out,
+            err = err,
+            duration = round(duration, 6),
+        ))
+        with self.lock:
+            self.file.write(line+'\n')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __str__(self):
+        return f'Recorder({self.path})'
+
+
+def load(path):
+    ''' {cmd : recorded results, in order}
+    '''
+    results = defaultdict(deque)
+    with opener(path, 'r') as src:
+        for line in src:
+            entry = loads(line)
+            results[entry['cmd']].append(entry)
+    return results
@@ -0,0 +1,66 @@
+from time import sleep
+
+from setux.core.action import Action, Actions
+from setux.core.target import CoreTarget
+
+
+class Target(CoreTarget):
+    def chk_cnx(self, report='quiet'):
+        return False
+
+
+class Leaf(Action):
+    @property
+    def label(self):
+        return f'leaf {self.name}'
+
+    def check(self):
+        sleep(0.01)
+        self.seen.append((self.name, self.target.context['scope']))
+        return True
+
+    def deploy(self):
+        return True
+
+
+class Group(Actions):
+    parallel = True
+
+    @property
+    def label(self):
+        return f'group {self.scope}'
+
+    def __enter__(self):
+        super().__enter__()
+        self.target.context['scope'] = self.scope
+
+    @property
+    def actions(self):
+        return [
+            Leaf(self.target, name=f'{self.scope}.{index}', seen=self.seen)
+            for index in range(4)
+        ]
+
+
+class Outer(Actions):
+    parallel = True
+
+    @property
+    def label(self):
+        return 'outer'
+
+    @property
+    def actions(self):
+        return [
+            Group(self.target, scope=f'group{index}', seen=self.seen)
+            for index in range(8)
+        ]
+
+
+def test_nested_parallel_scopes():
+    target, seen = Target(), list()
+    assert Outer(target, seen=seen)(verbose=False)
+    assert len(seen) == 32
+    for name, scope in seen:
+        assert name.startswith(f'{scope}.')
+    assert target.context == dict()